@@ -0,0 +1,118 @@
+"""
+Event-driven tracking of bridge arrivals on agent chain.
+
+Tracker subscribes to _receiveBridge of remote adapters and matches arrivals with amounts
+principals sent, indexed by (container, token). When every expected token of container arrived,
+callback gets exactly the (adapter, token) pairs that received funds, so agent claims
+only non-empty balances right away instead of polling every adapter and token.
+"""
+from bridge_adapters import BridgeAdapter
+from containers import AgentContainer
+from datastructures import SwapInstruction
+
+
+class ContainerArrivals:
+    """
+    :expected: token => amount still awaited
+    :received: (adapter, token) => amount received in current set
+    :incomplete: number of expected tokens not fully arrived
+    """
+    def __init__(self):
+        self.expected: dict[str, int] = dict()
+        self.received: dict[tuple[BridgeAdapter, str], int] = dict()
+        self.incomplete: int = 0
+
+
+class BridgeArrivalTracker:
+    """
+    :on_complete: on_complete(container, received) called once expected set of container arrived,
+        received is (adapter, token) => amount
+    :tolerance_bps: part of expected amount allowed to be lost on bridge fees
+    """
+    def __init__(self, on_complete, tolerance_bps: int = 0):
+        self.on_complete = on_complete
+        self.tolerance_bps = tolerance_bps
+        self._containers: dict[str, ContainerArrivals] = dict()
+        self._index: dict[tuple[str, str], int] = dict() # (container, token) => amount still awaited
+        self.completed: int = 0
+
+    def watch(self, bridge_adapter: BridgeAdapter) -> None:
+        bridge_adapter.subscribe(self._on_arrival)
+
+    def unwatch(self, bridge_adapter: BridgeAdapter) -> None:
+        bridge_adapter.unsubscribe(self._on_arrival)
+
+    def expect(self, container: str, token: str, amount: int) -> None:
+        """
+        Await amount of token (as received on agent chain) for container.
+        Arrivals which came before expectation are already counted.
+        Several tokens of one set should be registered with expect_many,
+        otherwise set may complete before its last token is expected.
+        """
+        self._expect(container, token, amount)
+        self._check(container)
+
+    def expect_many(self, container: str, tokens: list[str], amounts: list[int]) -> None:
+        if len(tokens) != len(amounts):
+            raise ValueError("tokens and amounts must have same length")
+        for token, amount in zip(tokens, amounts):
+            self._expect(container, token, amount)
+        self._check(container)
+
+    def awaited(self, container: str) -> dict[str, int]:
+        """token => amount still missing for container"""
+        arrivals = self._containers.get(container)
+        if arrivals is None:
+            return {}
+        return {token: self._index[(container, token)] for token in arrivals.expected if self._index[(container, token)] > 0}
+
+    def _expect(self, container: str, token: str, amount: int) -> None:
+        arrivals = self._containers.setdefault(container, ContainerArrivals())
+        minimum = amount * (10_000 - self.tolerance_bps) // 10_000
+        key = (container, token)
+        before = self._index.get(key, 0)
+        was_open = token in arrivals.expected and before > 0
+        arrivals.expected[token] = arrivals.expected.get(token, 0) + minimum
+        self._index[key] = before + minimum
+        if before + minimum > 0 and not was_open:
+            arrivals.incomplete += 1
+
+    def _on_arrival(self, bridge_adapter: BridgeAdapter, container: str, token: str, amount: int) -> None:
+        arrivals = self._containers.setdefault(container, ContainerArrivals())
+        received_key = (bridge_adapter, token)
+        arrivals.received[received_key] = arrivals.received.get(received_key, 0) + amount
+        key = (container, token)
+        before = self._index.get(key, 0)
+        self._index[key] = before - amount
+        if token in arrivals.expected and before > 0 >= before - amount:
+            arrivals.incomplete -= 1
+        self._check(container)
+
+    def _check(self, container: str) -> None:
+        arrivals = self._containers[container]
+        if not arrivals.expected or arrivals.incomplete:
+            return
+        del self._containers[container]
+        for token in arrivals.expected:
+            del self._index[(container, token)]
+        received = {key: amount for key, amount in arrivals.received.items() if key[1] in arrivals.expected}
+        early = {key: amount for key, amount in arrivals.received.items() if key[1] not in arrivals.expected}
+        if early:
+            # arrivals of tokens this set does not expect belong to next set, their index entries stay
+            self._containers[container] = ContainerArrivals()
+            self._containers[container].received = early
+        self.completed += 1
+        self.on_complete(container, received)
+
+
+def claim_and_prepare(agent: AgentContainer, swaps_for=None):
+    """
+    on_complete callback claiming every received (adapter, token) pair on agent
+    and running prepare_liquidity with swaps_for(container) (no swaps by default)
+    """
+    def on_complete(container: str, received: dict[tuple[BridgeAdapter, str], int]) -> None:
+        for bridge_adapter, token in received:
+            agent.claim_bridge(bridge_adapter, token)
+        swaps: list[SwapInstruction] = swaps_for(container) if swaps_for is not None else []
+        agent.prepare_liquidity(swaps)
+    return on_complete
@@ -0,0 +1,65 @@
+"""
+Multicall-style balance reads.
+
+BalanceReader sends balances of many (token, owner) pairs as one aggregated request
+instead of one balanceOf round trip per pair. LocalBalanceRPC is local chain stand-in
+with configurable per-request latency, RPCToken is ERC20 reading through it one call at a time.
+"""
+import time
+
+from datastructures import ERC20
+
+
+class LocalBalanceRPC:
+    """
+    Chain stand-in: every request (single balance_of or whole multicall) costs latency seconds.
+
+    :requests: requests served
+    """
+    def __init__(self, balances: dict[tuple[str, str], int] | None = None, latency: float = 0.0):
+        self.balances = balances if balances is not None else dict()
+        self.latency = latency
+        self.requests = 0
+
+    def _request(self) -> None:
+        self.requests += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def balance_of(self, token: str, owner: str) -> int:
+        self._request()
+        return self.balances.get((token, owner), 0)
+
+    def multicall(self, calls: list[tuple[str, str]]) -> list[int]:
+        """Balances of (token, owner) pairs in one request"""
+        self._request()
+        return [self.balances.get(call, 0) for call in calls]
+
+
+class RPCToken(ERC20):
+    """ERC20 with balances on LocalBalanceRPC"""
+    def __init__(self, address: str, rpc: LocalBalanceRPC, name: str = ""):
+        super().__init__(address, name)
+        self.rpc = rpc
+
+    def balanceOf(self, owner: str) -> int:
+        return self.rpc.balance_of(self.address, owner)
+
+
+class BalanceReader:
+    """
+    :rpc: endpoint with multicall(calls) -> list[int]; None - falls back to balanceOf of every token
+    """
+    def __init__(self, rpc: LocalBalanceRPC | None = None):
+        self.rpc = rpc
+
+    def read(self, tokens: list[ERC20], owner: str = "address(this)") -> list[int]:
+        """Balances of owner, aligned with tokens"""
+        return self.read_pairs([(token, owner) for token in tokens])
+
+    def read_pairs(self, pairs: list[tuple[ERC20, str]]) -> list[int]:
+        if not pairs:
+            return []
+        if self.rpc is None:
+            return [token.balanceOf(owner) for token, owner in pairs]
+        return self.rpc.multicall([(token.address, owner) for token, owner in pairs])
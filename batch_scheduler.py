@@ -0,0 +1,266 @@
+"""
+Automatic closing of vault deposit and withdrawal batches.
+
+BatchScheduler polls open batches on VirtualClock and closes them when BatchClosePolicy says so:
+by size (buffered notion / withdrawal shares), by number of positions, by age, or when
+waiting cost of buffered amount exceeds fixed cost of one batch. Every decision is recorded
+in SchedulerMetrics.
+
+Run from repository root:
+    PYTHONPATH=. python batch_scheduler.py --hours 24
+"""
+import argparse
+import random
+
+from containers import Container
+from datastructures import ERC20
+from simulation import VirtualClock
+from swap_router import SwapRouter
+from vault import Vault
+
+
+class BatchClosePolicy:
+    """
+    :min_amount: close when buffered amount (notion or withdrawal shares) reaches it
+    :max_positions: close deposit batch when it has this many positions
+    :max_age: close non-empty batch older than this, seconds
+    :min_age: never close younger batch, lets bursts coalesce
+    :fixed_cost: cost of processing one batch (gas, bridge fees), notion units
+    :waiting_cost: cost of one notion unit waiting one second; batch closes
+        when amount * age * waiting_cost reaches fixed_cost
+    """
+    SIZE = "size"
+    COUNT = "count"
+    AGE = "age"
+    COST = "cost"
+
+    def __init__(
+        self,
+        min_amount: int | None = None,
+        max_positions: int | None = None,
+        max_age: float | None = None,
+        min_age: float = 0.0,
+        fixed_cost: float = 0.0,
+        waiting_cost: float = 0.0,
+    ):
+        self.min_amount = min_amount
+        self.max_positions = max_positions
+        self.max_age = max_age
+        self.min_age = min_age
+        self.fixed_cost = fixed_cost
+        self.waiting_cost = waiting_cost
+
+    def reason(self, amount: int, positions: int, age: float) -> str | None:
+        """Why batch should close now, None - keep it open"""
+        if amount == 0 or age < self.min_age:
+            return None
+        if self.min_amount is not None and amount >= self.min_amount:
+            return self.SIZE
+        if self.max_positions is not None and positions >= self.max_positions:
+            return self.COUNT
+        if self.max_age is not None and age >= self.max_age:
+            return self.AGE
+        if self.waiting_cost > 0 and amount * age * self.waiting_cost >= self.fixed_cost:
+            return self.COST
+        return None
+
+
+class BatchDecision:
+    """
+    :kind: "deposit" or "withdrawal"
+    :amount: buffered notion or withdrawal shares at close
+    :positions: positions in batch, deposit only
+    """
+    def __init__(self, at: float, kind: str, batch_id: int, reason: str, amount: int, positions: int, age: float):
+        self.at = at
+        self.kind = kind
+        self.batch_id = batch_id
+        self.reason = reason
+        self.amount = amount
+        self.positions = positions
+        self.age = age
+
+
+class SchedulerMetrics:
+    """
+    :decisions: every closed batch in order
+    :deferred: checks where batch was open, not empty and not closed (in flight limit)
+    """
+    def __init__(self):
+        self.decisions: list[BatchDecision] = []
+        self.reasons: dict[tuple[str, str], int] = dict()
+        self.deferred: int = 0
+        self.netted_notion: int = 0
+
+    def record(self, decision: BatchDecision) -> None:
+        self.decisions.append(decision)
+        key = (decision.kind, decision.reason)
+        self.reasons[key] = self.reasons.get(key, 0) + 1
+
+    def summary(self, kind: str = "deposit") -> dict:
+        decisions = [decision for decision in self.decisions if decision.kind == kind]
+        if not decisions:
+            return {"batches": 0}
+        ages = sorted(decision.age for decision in decisions)
+        return {
+            "batches": len(decisions),
+            "age_mean": sum(ages) / len(ages),
+            "age_p50": ages[len(ages) // 2],
+            "age_max": ages[-1],
+            "amount_mean": sum(decision.amount for decision in decisions) / len(decisions),
+            "positions_mean": sum(decision.positions for decision in decisions) / len(decisions),
+            "reasons": {reason: count for (batch_kind, reason), count in self.reasons.items() if batch_kind == kind},
+        }
+
+
+class BatchScheduler:
+    """
+    :check_interval: polling period, seconds of clock
+    :withdrawal_policy: policy for withdrawal batches, deposit policy by default
+    :max_deposit_batches_in_flight: deposit batches processing at once (see Vault.pending_deposit_batches)
+    :net_batches: call Vault.net_current_batches when both batches close in one check
+    :on_close: on_close(decision) after batch processing started, e.g. to drive containers
+    """
+    DEPOSIT = "deposit"
+    WITHDRAWAL = "withdrawal"
+
+    def __init__(
+        self,
+        vault: Vault,
+        policy: BatchClosePolicy,
+        clock: VirtualClock,
+        check_interval: float = 1.0,
+        withdrawal_policy: BatchClosePolicy | None = None,
+        max_deposit_batches_in_flight: int | None = None,
+        net_batches: bool = True,
+        on_close=None,
+    ):
+        self.vault = vault
+        self.policy = policy
+        self.withdrawal_policy = withdrawal_policy or policy
+        self.clock = clock
+        self.check_interval = check_interval
+        self.max_deposit_batches_in_flight = max_deposit_batches_in_flight
+        self.net_batches = net_batches
+        self.on_close = on_close
+        self.metrics = SchedulerMetrics()
+        self._opened_at: dict[tuple[str, int], float] = dict() # (kind, batch_id) -> first seen non-empty
+        self._running = False
+
+    def start(self) -> None:
+        self._running = True
+        self.clock.schedule(0.0, self._tick)
+
+    def stop(self) -> None:
+        self._running = False
+
+    def poke(self) -> None:
+        """Check right away, e.g. after deposit, instead of waiting for next tick"""
+        self.check()
+
+    def _tick(self) -> None:
+        if not self._running:
+            return
+        self.check()
+        self.clock.schedule(self.check_interval, self._tick)
+
+    def check(self) -> list[BatchDecision]:
+        vault = self.vault
+        deposit_id = vault.deposit_batch.id_
+        deposit_amount = vault.deposit_batch.buffered_amount
+        deposit_positions = len(vault.deposit_batch_positions(deposit_id))
+        deposit_reason = self._reason(self.DEPOSIT, deposit_id, deposit_amount, deposit_positions, self.policy)
+        if deposit_reason is not None and not self._deposit_slot_free():
+            deposit_reason = None
+            self.metrics.deferred += 1
+
+        withdrawal_id = vault.withdrawal_batch.id_
+        withdrawal_shares = vault.withdrawal_batch.batch_shares_amount
+        withdrawal_reason = self._reason(self.WITHDRAWAL, withdrawal_id, withdrawal_shares, 0, self.withdrawal_policy)
+        if withdrawal_reason is not None and self._withdrawal_in_flight():
+            withdrawal_reason = None
+            self.metrics.deferred += 1
+
+        if deposit_reason is not None and withdrawal_reason is not None and self.net_batches:
+            netted_notion, _ = vault.net_current_batches()
+            self.metrics.netted_notion += netted_notion
+
+        decisions = []
+        if deposit_reason is not None:
+            decisions.append(self._decision(self.DEPOSIT, deposit_id, deposit_reason, deposit_amount, deposit_positions))
+            vault.start_current_deposit_batch_processing()
+        if withdrawal_reason is not None:
+            decisions.append(self._decision(self.WITHDRAWAL, withdrawal_id, withdrawal_reason, withdrawal_shares, 0))
+            vault.start_current_withdrawal_batch_processing()
+        for decision in decisions:
+            self.metrics.record(decision)
+            if self.on_close is not None:
+                self.on_close(decision)
+        return decisions
+
+    def _reason(self, kind: str, batch_id: int, amount: int, positions: int, policy: BatchClosePolicy) -> str | None:
+        if amount == 0:
+            return None
+        opened_at = self._opened_at.setdefault((kind, batch_id), self.clock.now)
+        return policy.reason(amount, positions, self.clock.now - opened_at)
+
+    def _decision(self, kind: str, batch_id: int, reason: str, amount: int, positions: int) -> BatchDecision:
+        opened_at = self._opened_at.pop((kind, batch_id))
+        return BatchDecision(self.clock.now, kind, batch_id, reason, amount, positions, self.clock.now - opened_at)
+
+    def _deposit_slot_free(self) -> bool:
+        limit = self.max_deposit_batches_in_flight
+        return limit is None or len(self.vault.pending_deposit_batches) < limit
+
+    def _withdrawal_in_flight(self) -> bool:
+        """
+        start_current_withdrawal_batch_processing overwrites pending batch, only one can be in flight:
+        pending batch is in flight until finish_withdrawal_batch_processing ran for it
+        """
+        pending_id = getattr(self.vault.pending_withdrawal_batch, "id_", None)
+        return pending_id is not None and not self.vault.withdrawal_batch_finished(pending_id)
+
+
+def _bursty_deposits(vault: Vault, clock: VirtualClock, scheduler: BatchScheduler, rng: random.Random, hours: float) -> None:
+    """Poisson deposits with rate switching between quiet (1/min) and burst (1/s) periods"""
+    end = hours * 3600
+
+    def deposit(rate: float, switch_at: float) -> None:
+        if clock.now >= end:
+            return
+        if clock.now >= switch_at:
+            rate = 1.0 if rate < 1.0 else 1 / 60
+            switch_at = clock.now + rng.expovariate(1 / (300 if rate == 1.0 else 3600))
+        vault.create_deposit_request(rng.randint(100, 10_000))
+        clock.schedule(rng.expovariate(rate), deposit, rate, switch_at)
+
+    clock.schedule(0.0, deposit, 1 / 60, 0.0)
+    clock.schedule(end, scheduler.stop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    policies = {
+        "age 10m": BatchClosePolicy(max_age=600),
+        "size 1M | age 30m": BatchClosePolicy(min_amount=1_000_000, max_age=1800),
+        "count 200 | age 30m": BatchClosePolicy(max_positions=200, max_age=1800),
+        "cost 1000 @ 1e-6": BatchClosePolicy(fixed_cost=1000, waiting_cost=1e-6, max_age=3600),
+    }
+    for name, policy in policies.items():
+        clock = VirtualClock()
+        notion = ERC20(address="0x01", name="USDC")
+        vault = Vault(notion)
+        vault.add_container(Container(swap_router=SwapRouter(), notion=notion), vault.PRECISION)
+        scheduler = BatchScheduler(vault, policy, clock, check_interval=5.0)
+        _bursty_deposits(vault, clock, scheduler, random.Random(args.seed), args.hours)
+        scheduler.start()
+        clock.run()
+        summary = scheduler.metrics.summary()
+        print(
+            f"{name:<22} batches={summary['batches']:>4} age p50={summary['age_p50']:>7.0f}s max={summary['age_max']:>7.0f}s "
+            f"amount={summary['amount_mean']:>12,.0f} positions={summary['positions_mean']:>6.1f} reasons={summary['reasons']}"
+        )
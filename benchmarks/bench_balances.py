@@ -0,0 +1,47 @@
+"""
+exit_logic balance reads against LocalBalanceRPC with per-request latency:
+one balanceOf request per token vs BalanceReader multicall vs multicall + ReadCache.
+
+Run from repository root:
+    PYTHONPATH=. python benchmarks/bench_balances.py --logics 10 --tokens 8 --latency 0.005
+"""
+import argparse
+import time
+
+from balance_reader import BalanceReader, LocalBalanceRPC, RPCToken
+from containers import AgentContainer, Logic
+from datastructures import WithdrawalRequest
+from read_cache import ReadCache
+from swap_router import SwapRouter
+
+
+def run(logics: int, tokens: int, latency: float, reader: bool, cache: bool) -> tuple[float, int]:
+    rpc = LocalBalanceRPC(latency=latency)
+    rpc_tokens = [RPCToken(f"0x{i:040x}", rpc) for i in range(tokens)]
+    agent = AgentContainer(swap_router=SwapRouter(), notion=rpc_tokens[0])
+    if reader:
+        agent.balance_reader = BalanceReader(rpc)
+    if cache:
+        agent.read_cache = ReadCache()
+    agent_logics = [Logic() for _ in range(logics)]
+    for logic in agent_logics:
+        agent.setLogic(logic, True)
+    agent._claim_withdrawal_request(WithdrawalRequest(shares_for_withdrawal=1, total_shares=10))
+
+    started = time.perf_counter()
+    for logic in agent_logics:
+        agent.exit_logic(logic, rpc_tokens, [0] * tokens)
+    return time.perf_counter() - started, rpc.requests
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logics", type=int, default=10)
+    parser.add_argument("--tokens", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per RPC request")
+    args = parser.parse_args()
+
+    print(f"{args.logics} exit_logic calls x {args.tokens} tokens, {args.latency * 1e3:.1f} ms per request")
+    for name, reader, cache in [("balanceOf per token", False, False), ("multicall", True, False), ("multicall + cache", True, True)]:
+        elapsed, requests = run(args.logics, args.tokens, args.latency, reader, cache)
+        print(f"{name:<20} {elapsed * 1e3:>9.1f} ms {requests:>6} requests")
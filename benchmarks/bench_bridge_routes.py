@@ -0,0 +1,63 @@
+"""
+Batch latency in MultiChainSimulation with different bridge routing:
+single adapter, even split over adapters (simulation default) and BridgeRoutePlanner.
+Across is fast but fills at limited throughput (relayer liquidity), CCTP is slow with no limit.
+
+Run from repository root:
+    PYTHONPATH=. python benchmarks/bench_bridge_routes.py --batches 500
+"""
+import argparse
+
+from bridge_adapters import AcrossBridgeAdapter, CCTPBridgeAdapter
+from bridge_router import BridgeModel, BridgeRoutePlanner
+from simulation import Constant, DistributionLatency, LogNormal, MultiChainSimulation
+
+ACROSS_MEDIAN, CCTP_MEDIAN = 120, 900
+
+
+def latency(across_throughput: float) -> DistributionLatency:
+    return DistributionLatency(
+        bridge={AcrossBridgeAdapter: LogNormal(ACROSS_MEDIAN, 0.5), CCTPBridgeAdapter: LogNormal(CCTP_MEDIAN, 0.2)},
+        message=LogNormal(60, 0.3),
+        call=Constant(12),
+        bridge_throughput={AcrossBridgeAdapter: across_throughput},
+    )
+
+
+def models(across_throughput: float) -> dict[type, BridgeModel]:
+    return {
+        AcrossBridgeAdapter: BridgeModel(fee_bps=5, latency=ACROSS_MEDIAN, throughput=across_throughput),
+        CCTPBridgeAdapter: BridgeModel(fee_fixed=1, latency=CCTP_MEDIAN),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--containers", type=int, default=2)
+    parser.add_argument("--deposit-rate", type=float, default=1.0)
+    parser.add_argument("--across-throughput", type=float, default=3_000.0, help="tokens per second")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    routings = {
+        "across only": dict(adapters=(AcrossBridgeAdapter,)),
+        "cctp only": dict(adapters=(CCTPBridgeAdapter,)),
+        "even split": dict(),
+        "planner (time)": dict(bridge_models=models(args.across_throughput)),
+        "planner (cost)": dict(bridge_models=models(args.across_throughput), bridge_objective=BridgeRoutePlanner.COST),
+    }
+    print(f"{'routing':<16} {'p50 s':>9} {'p90 s':>9} {'p99 s':>9} {'deposits/s':>11} {'wall s':>8}")
+    for name, options in routings.items():
+        simulation = MultiChainSimulation(
+            containers=args.containers,
+            latency=latency(args.across_throughput),
+            deposit_rate=args.deposit_rate,
+            seed=args.seed,
+            **options,
+        )
+        summary = simulation.run(args.batches).summary()
+        print(
+            f"{name:<16} {summary['batch_latency_p50']:>9,.0f} {summary['batch_latency_p90']:>9,.0f} "
+            f"{summary['batch_latency_p99']:>9,.0f} {summary['deposits_per_second']:>11.3f} {summary['wall_time']:>8.2f}"
+        )
@@ -0,0 +1,59 @@
+"""
+Encode/decode ops/sec for every Message subclass: precompiled codecs vs generic eth_abi.
+
+Run from repository root:
+    PYTHONPATH=. python benchmarks/bench_codecs.py
+"""
+import argparse
+import timeit
+
+from eth_abi import decode, encode
+
+from datastructures import (
+    BridgeMessage,
+    ContainerMessage,
+    MessageType,
+    SuccessDepositConfirmation,
+    WithdrawalRequest,
+    WithdrawalResponse,
+)
+
+MESSAGES = [
+    (ContainerMessage(type=MessageType.DEPOSIT_CONFIRMATION, data=bytes(64)), ["uint8", "bytes"]),
+    (BridgeMessage(container="0x0000000000000000000000000000000000000002"), ["address"]),
+    (SuccessDepositConfirmation(nav_after_harvest=10 ** 24, nav_after_harvest_and_enter=10 ** 24 + 7, batch_id=3), ["uint256", "uint256", "uint256"]),
+    (WithdrawalRequest(shares_for_withdrawal=10 ** 21, total_shares=10 ** 24), ["uint256", "uint256"]),
+    (WithdrawalResponse(nav_after_harvest=10 ** 24, nav_after_harvest_and_enter=10 ** 24 + 7), ["uint256", "uint256"]),
+]
+
+
+def abi_values(message) -> list:
+    if isinstance(message, ContainerMessage):
+        return [message.type.value, message.payload]
+    if isinstance(message, BridgeMessage):
+        return [message.container]
+    return list(vars(message).values())
+
+
+def ops_per_second(function, number: int) -> float:
+    return number / min(timeit.repeat(function, number=number, repeat=3))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'message':<28}{'encode':>12}{'eth_abi':>12}{'decode':>12}{'eth_abi':>12}   ops/sec")
+    for message, types in MESSAGES:
+        values = abi_values(message)
+        raw = message.to_bytes()
+        assert raw == encode(types, values)
+        message_type = type(message)
+        print(
+            f"{message_type.__name__:<28}"
+            f"{ops_per_second(message.to_bytes, args.number):>12,.0f}"
+            f"{ops_per_second(lambda: encode(types, values), args.number):>12,.0f}"
+            f"{ops_per_second(lambda: message_type.from_bytes(raw), args.number):>12,.0f}"
+            f"{ops_per_second(lambda: decode(types, raw), args.number):>12,.0f}"
+        )
@@ -0,0 +1,77 @@
+"""
+Memory and throughput of vault position storage:
+dict[int, Position] + owners dict (previous layout) vs PositionTable.
+
+Run from repository root:
+    PYTHONPATH=. python benchmarks/bench_positions.py --sizes 1000000 10000000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from datastructures import Position, PositionTable
+
+
+def build_dict(n: int):
+    positions = dict()
+    owners = dict()
+    for i in range(n):
+        positions[i] = Position(notion_amount=100 + i, deposit_batch_id=i // 1000)
+        owners[i] = "msg.sender"
+    return positions, owners
+
+
+def build_table(n: int):
+    table = PositionTable()
+    for i in range(n):
+        table.append("msg.sender", 100 + i, i // 1000)
+    return table
+
+
+def claim_all(positions, n: int) -> None:
+    for i in range(n):
+        position = positions[i]
+        position.shares_amount = position.notion_amount * 3 // 4
+        position.notion_amount = 0
+
+
+def measure(name: str, build, n: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build(n)
+    build_time = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    positions = built[0] if isinstance(built, tuple) else built
+    started = time.perf_counter()
+    claim_all(positions, n)
+    claim_time = time.perf_counter() - started
+
+    gc.collect()
+    started = time.perf_counter()
+    gc.collect()
+    gc_time = time.perf_counter() - started
+
+    print(
+        f"{name:<14} n={n:>10,} "
+        f"memory={memory / 2 ** 20:>9.1f} MiB ({memory / n:>6.1f} B/position) "
+        f"build={n / build_time:>12,.0f} pos/s "
+        f"claim={n / claim_time:>12,.0f} pos/s "
+        f"full gc={gc_time * 1000:>8.1f} ms"
+    )
+    del built, positions
+    gc.collect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--skip-dict", action="store_true", help="do not measure previous dict layout")
+    args = parser.parse_args()
+    for size in args.sizes:
+        if not args.skip_dict:
+            measure("dict+Position", build_dict, size)
+        measure("PositionTable", build_table, size)
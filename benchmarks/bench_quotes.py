@@ -0,0 +1,70 @@
+"""
+SwapRouter.quoteBest latency with RPC-like adapters:
+serial loop over adapters (previous behaviour) vs concurrent fan-out vs TTL quote cache.
+
+Run from repository root:
+    PYTHONPATH=. python benchmarks/bench_quotes.py --adapters 8 --latency 0.05
+"""
+import argparse
+import time
+
+from datastructures import SwapInstruction
+from swap_router import QuoteCache, SwapAdapter, SwapRouter
+
+
+class LatencyAdapter(SwapAdapter):
+    """Local stand-in for RPC-backed pool: sleeps latency seconds and quotes fixed rate"""
+    def __init__(self, pool: str, latency: float, rate_bps: int):
+        self.pool = pool
+        self.latency = latency
+        self.rate_bps = rate_bps
+        self.calls = 0
+
+    def quoteSwap(self, swap: SwapInstruction) -> int:
+        self.calls += 1
+        time.sleep(self.latency)
+        return swap.amount_in * self.rate_bps // 10_000
+
+
+def serial_quote_best(router: SwapRouter, swap: SwapInstruction) -> int:
+    return max(adapter.quoteSwap(swap) for adapter in router.adaptersList)
+
+
+def measure(name: str, function, swaps: list[SwapInstruction]) -> None:
+    started = time.perf_counter()
+    for swap in swaps:
+        function(swap)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<34} {elapsed / len(swaps) * 1000:>9.2f} ms/quote")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adapters", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per adapter quote")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="latency of one extra adapter slower than timeout")
+    parser.add_argument("--timeout", type=float, default=0.2)
+    parser.add_argument("--quotes", type=int, default=20)
+    args = parser.parse_args()
+
+    adapters = [LatencyAdapter(f"pool{i}", args.latency, 9_950 + i) for i in range(args.adapters)]
+    swaps = [SwapInstruction(amount_in=1_000_000 + i * 1_000, min_amount_out=0, token_in="USDT", token_out="USDC", payload=bytes()) for i in range(args.quotes)]
+
+    serial = SwapRouter()
+    serial.adaptersList = list(adapters)
+    measure("serial (previous quoteBest)", lambda swap: serial_quote_best(serial, swap), swaps)
+
+    concurrent = SwapRouter(quote_timeout=args.timeout, quote_cache=QuoteCache(ttl=0))
+    concurrent.adaptersList = list(adapters)
+    measure("concurrent, no cache", concurrent.quoteBest, swaps)
+
+    concurrent = SwapRouter(quote_timeout=args.timeout, quote_cache=QuoteCache(ttl=0))
+    concurrent.adaptersList = list(adapters) + [LatencyAdapter("slow", args.slow_latency, 10_100)]
+    measure("concurrent, no cache, +1 slow", concurrent.quoteBest, swaps)
+
+    cached = SwapRouter(quote_timeout=args.timeout, quote_cache=QuoteCache(ttl=60))
+    cached.adaptersList = list(adapters)
+    measure("concurrent + TTL cache", cached.quoteBest, swaps)
+    cache = cached.quote_cache
+    print(f"cache hits={cache.hits} misses={cache.misses} hit rate={cache.hits / (cache.hits + cache.misses):.0%}")
+    concurrent._quote_executor.shutdown(wait=False, cancel_futures=True)
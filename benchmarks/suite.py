@@ -0,0 +1,293 @@
+"""
+Benchmark suite for vault, container and codec hot paths.
+
+Workloads follow assertion scripts in scripts/ (vault_enter, vault_exit, vault_enter_failed,
+container_enter) parametrized by number of positions and containers.
+Every timed operation is reported as ns/op, results are written to JSON;
+compare mode fails with exit code 1 if any operation is slower than baseline by more than threshold.
+Full default grid takes about 12 minutes on one core, narrow it with --positions/--containers/--workloads.
+
+Run from repository root:
+    PYTHONPATH=. python benchmarks/suite.py --output bench.json
+    PYTHONPATH=. python benchmarks/suite.py --output new.json --compare bench.json --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from bench_codecs import MESSAGES
+from bridge_adapters import AcrossBridgeAdapter
+from containers import AgentContainer, Container, Logic, PrincipalContainer
+from datastructures import BridgeInstruction, BridgeMessage, ContainerMessage, ERC20, MessageType
+from swap_router import SwapRouter
+from vault import Vault
+
+DEFAULT_POSITIONS = [10, 1_000, 100_000, 1_000_000]
+DEFAULT_CONTAINERS = [1, 16, 256]
+
+
+class Recorder:
+    """Collects total time and operation count per operation name"""
+    def __init__(self, prefix: str, results: dict):
+        self.prefix = prefix
+        self.results = results
+
+    def time(self, name: str, function, ops: int = 1):
+        started = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - started
+        key = f"{self.prefix}/{name}"
+        total_ns, total_ops = self.results.get(key, (0, 0))
+        self.results[key] = (total_ns + elapsed * 1e9, total_ops + ops)
+        return value
+
+
+def _vault(containers: int) -> tuple[Vault, list[Container]]:
+    notion = ERC20(address="0x01", name="USDC")
+    router = SwapRouter()
+    vault = Vault(notion)
+    weight = vault.PRECISION // containers
+    vault_containers = [Container(swap_router=router, notion=notion) for _ in range(containers)]
+    for container in vault_containers:
+        vault.add_container(container, weight)
+    return vault, vault_containers
+
+
+def _deposit(recorder: Recorder, vault: Vault, positions: int) -> None:
+    def deposits():
+        for _ in range(positions):
+            vault.create_deposit_request(100)
+    recorder.time("create_deposit_request", deposits, positions)
+    recorder.time("start_current_deposit_batch_processing", vault.start_current_deposit_batch_processing)
+
+
+def vault_enter(recorder: Recorder, positions: int, containers: int) -> None:
+    vault, _ = _vault(containers)
+    _deposit(recorder, vault, positions)
+    amount = positions * 100 // containers
+
+    def callbacks():
+        for _ in range(containers):
+            vault.deposit_container_callback(nav_after_harvest=0, nav_after_harvest_and_enter=amount - 1, notion_token_remainder=0)
+    recorder.time("deposit_container_callback", callbacks, containers)
+    recorder.time("finish_deposit_batch_processing", vault.finish_deposit_batch_processing)
+
+    half = positions // 2
+
+    def claims():
+        for position_id in range(half):
+            vault.claim_shares_after_deposit(position_id)
+    recorder.time("claim_shares_after_deposit", claims, half)
+    recorder.time("settle_deposit_batch", lambda: vault.settle_deposit_batch(0), positions - half)
+
+
+def vault_enter_bulk(recorder: Recorder, positions: int, containers: int) -> None:
+    """vault_enter with all confirmations in one deposit_container_callbacks delivery"""
+    vault, vault_containers = _vault(containers)
+    _deposit(recorder, vault, positions)
+    amount = positions * 100 // containers
+    recorder.time(
+        "deposit_container_callbacks",
+        lambda: vault.deposit_container_callbacks([0] * containers, [amount - 1] * containers, [0] * containers, containers=vault_containers),
+        containers,
+    )
+    recorder.time("finish_deposit_batch_processing", vault.finish_deposit_batch_processing)
+
+
+def vault_enter_failed(recorder: Recorder, positions: int, containers: int) -> None:
+    vault, _ = _vault(containers)
+    _deposit(recorder, vault, positions)
+    amount = positions * 100 // containers
+
+    def callbacks():
+        for _ in range(containers):
+            vault.deposit_container_callback(nav_after_harvest=0, nav_after_harvest_and_enter=0, notion_token_remainder=amount - 1)
+    recorder.time("deposit_container_callback", callbacks, containers)
+    recorder.time("finish_deposit_batch_processing", vault.finish_deposit_batch_processing)
+
+    def claims():
+        for position_id in range(positions):
+            vault.claim_remainder_after_deposit(position_id)
+    recorder.time("claim_remainder_after_deposit", claims, positions)
+
+
+def vault_exit(recorder: Recorder, positions: int, containers: int) -> None:
+    vault, _ = _vault(containers)
+    _deposit(recorder, vault, positions)
+    amount = positions * 100 // containers
+    for _ in range(containers):
+        vault.deposit_container_callback(nav_after_harvest=0, nav_after_harvest_and_enter=amount, notion_token_remainder=0)
+    vault.finish_deposit_batch_processing()
+    vault.settle_deposit_batch(0)
+
+    def requests():
+        for position_id in range(positions):
+            vault.create_withdrawal_request(position_id, vault.positions.shares_amount[position_id])
+    recorder.time("create_withdrawal_request", requests, positions)
+    recorder.time("start_current_withdrawal_batch_processing", vault.start_current_withdrawal_batch_processing)
+
+    def callbacks():
+        for _ in range(containers):
+            vault.withdrawal_container_callback(notion_growth=amount)
+    recorder.time("withdrawal_container_callback", callbacks, containers)
+    recorder.time("finish_withdrawal_batch_processing", vault.finish_withdrawal_batch_processing)
+
+    def claims():
+        for position_id in range(positions):
+            vault.claim_withdrawn_notion_token(position_id, 0)
+    recorder.time("claim_withdrawn_notion_token", claims, positions)
+
+
+def container_enter(recorder: Recorder, positions: int, containers: int) -> None:
+    """Full container round trip from scripts/container_enter.py for every container"""
+    usdc = ERC20(address="0x01", name="USDC")
+    usdc_on_l2 = ERC20(address="0x03", name="USDC")
+    router = SwapRouter()
+    vault = Vault(usdc)
+    pairs = []
+    for _ in range(containers):
+        principal = PrincipalContainer(vault=vault, swap_router=router, notion=usdc)
+        agent = AgentContainer(swap_router=router, notion=usdc_on_l2)
+        logic = Logic()
+        agent.setLogic(logic, True)
+        vault.add_container(principal, vault.PRECISION // containers)
+        pairs.append((principal, agent, logic, AcrossBridgeAdapter(), AcrossBridgeAdapter()))
+    for _ in range(positions):
+        vault.create_deposit_request(100)
+    vault.start_current_deposit_batch_processing()
+    amount = positions * 100 // containers
+    data = BridgeMessage(container=PrincipalContainer.address).to_bytes()
+
+    def start_enters():
+        for principal, _, _, source, _ in pairs:
+            principal.start_enter([], [source], [BridgeInstruction(token=usdc.address, amount=amount, payload=bytes())])
+    recorder.time("start_enter", start_enters, containers)
+
+    def arrivals():
+        for _, _, _, _, remote in pairs:
+            remote.handleV3AcrossMessage(token=usdc_on_l2.address, amount=amount, recipient="0x", data=data)
+    recorder.time("handleV3AcrossMessage", arrivals, containers)
+
+    def claims():
+        for _, agent, _, _, remote in pairs:
+            agent.claim_bridge(remote, usdc_on_l2.address)
+    recorder.time("claim_bridge", claims, containers)
+
+    def enters():
+        for _, agent, logic, _, _ in pairs:
+            agent.enter_logic(logic, [usdc_on_l2], [amount], 0)
+    recorder.time("enter_logic", enters, containers)
+
+    def confirmations():
+        raws = []
+        for _, agent, _, _, _ in pairs:
+            agent.finalize_success_enters()
+            raws.append(ContainerMessage(type=MessageType.DEPOSIT_CONFIRMATION, data=agent.last_message.to_bytes()).to_bytes())
+            agent.drain_outbox()
+        return raws
+    raws = recorder.time("finalize_success_enters", confirmations, containers)
+
+    def receives():
+        for (principal, _, _, _, _), raw in zip(pairs, raws):
+            principal.receive_message(raw)
+    recorder.time("receive_message", receives, containers)
+
+    def finalizes():
+        for principal, _, _, _, _ in pairs:
+            principal.finalize_enter([], [])
+    recorder.time("finalize_enter", finalizes, containers)
+    recorder.time("finish_deposit_batch_processing", vault.finish_deposit_batch_processing)
+
+
+def codecs(recorder: Recorder, number: int) -> None:
+    for message, _ in MESSAGES:
+        message_type = type(message)
+        raw = message.to_bytes()
+
+        def encode():
+            for _ in range(number):
+                message.to_bytes()
+
+        def decode():
+            for _ in range(number):
+                message_type.from_bytes(raw)
+        recorder.time(f"{message_type.__name__}.to_bytes", encode, number)
+        recorder.time(f"{message_type.__name__}.from_bytes", decode, number)
+
+
+WORKLOADS = {
+    "vault_enter": vault_enter,
+    "vault_enter_bulk": vault_enter_bulk,
+    "vault_enter_failed": vault_enter_failed,
+    "vault_exit": vault_exit,
+    "container_enter": container_enter,
+}
+
+
+def run(positions: list[int], containers: list[int], workloads: list[str], repeat: int, codec_ops: int) -> dict:
+    """:return: operation key -> {"ns_per_op", "ops"}, best of repeat runs"""
+    best: dict[str, dict] = dict()
+    for _ in range(repeat):
+        raw: dict[str, tuple[float, int]] = dict()
+        for name in workloads:
+            for position_count in positions:
+                for container_count in containers:
+                    recorder = Recorder(f"{name}/positions={position_count}/containers={container_count}", raw)
+                    WORKLOADS[name](recorder, position_count, container_count)
+        codecs(Recorder("codecs", raw), codec_ops)
+        for key, (total_ns, ops) in raw.items():
+            ns_per_op = total_ns / ops if ops else total_ns
+            if key not in best or ns_per_op < best[key]["ns_per_op"]:
+                best[key] = {"ns_per_op": ns_per_op, "ops": ops, "total_ns": total_ns}
+    return best
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_total_ns: float = 0) -> list[tuple[str, float, float]]:
+    """
+    :param min_total_ns: operations measured for less time than this (single fast calls) are too noisy to gate on
+    :return: (key, baseline ns/op, current ns/op) of operations slower than baseline * (1 + threshold)
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline or baseline[key].get("total_ns", min_total_ns) < min_total_ns:
+            continue
+        before, after = baseline[key]["ns_per_op"], result["ns_per_op"]
+        if after > before * (1 + threshold):
+            regressions.append((key, before, after))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positions", type=int, nargs="+", default=DEFAULT_POSITIONS)
+    parser.add_argument("--containers", type=int, nargs="+", default=DEFAULT_CONTAINERS)
+    parser.add_argument("--workloads", nargs="+", choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    parser.add_argument("--repeat", type=int, default=1, help="best of N runs")
+    parser.add_argument("--codec-ops", type=int, default=20_000)
+    parser.add_argument("--output", help="write results JSON")
+    parser.add_argument("--compare", help="baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 = 10%%")
+    parser.add_argument("--min-time", type=float, default=1.0, help="gate only operations measured for at least this many ms")
+    args = parser.parse_args()
+
+    results = run(args.positions, args.containers, args.workloads, args.repeat, args.codec_ops)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {"python": sys.version, "platform": platform.platform(), "created": time.time()},
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+    for key, result in sorted(results.items()):
+        print(f"{key:<100} {result['ns_per_op']:>14,.0f} ns/op  x{result['ops']}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_time * 1e6)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before:,.0f} -> {after:,.0f} ns/op ({after / before - 1:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
@@ -1,36 +1,145 @@
-from collections import defaultdict
+from array import array
 
 from datastructures import ERC20, BridgeInstruction, BridgeMessage
-from eth_abi import decode
+
+
+class ClaimableLedger:
+    """
+    Flat holder => token => amount ledger.
+    Holders and tokens are interned to int ids, (holder id, token id) is packed into one int key
+    which points to slot in amounts column. Column is array("Q") promoted to list on uint64 overflow.
+    """
+    def __init__(self):
+        self._holder_ids: dict[str, int] = dict()
+        self._token_ids: dict[str, int] = dict()
+        self._tokens: list[str] = []
+        self._slots: dict[int, int] = dict() # holder_id << 32 | token_id => slot
+        self._holder_slots: dict[int, list[int]] = dict() # holder_id => slots
+        self._slot_tokens = array("I") # slot => token_id
+        self._amounts = array("Q") # slot => amount
+
+    def _slot(self, holder: str, token: str) -> int:
+        holder_id = self._holder_ids.setdefault(holder, len(self._holder_ids))
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = self._token_ids[token] = len(self._tokens)
+            self._tokens.append(token)
+        key = holder_id << 32 | token_id
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = len(self._amounts)
+            self._holder_slots.setdefault(holder_id, []).append(slot)
+            self._slot_tokens.append(token_id)
+            self._amounts.append(0)
+        return slot
+
+    def _find(self, holder: str, token: str) -> int | None:
+        holder_id = self._holder_ids.get(holder)
+        token_id = self._token_ids.get(token)
+        if holder_id is None or token_id is None:
+            return None
+        return self._slots.get(holder_id << 32 | token_id)
+
+    def credit(self, holder: str, token: str, amount: int) -> None:
+        slot = self._slot(holder, token)
+        try:
+            self._amounts[slot] += amount
+        except OverflowError:
+            self._amounts = list(self._amounts)
+            self._amounts[slot] += amount
+
+    def awaited(self, holder: str, token: str) -> int:
+        slot = self._find(holder, token)
+        return 0 if slot is None else self._amounts[slot]
+
+    def awaited_all(self, holder: str) -> dict[str, int]:
+        """token => amount of every non-zero balance of holder"""
+        holder_id = self._holder_ids.get(holder)
+        if holder_id is None:
+            return {}
+        amounts, slot_tokens, tokens = self._amounts, self._slot_tokens, self._tokens
+        return {tokens[slot_tokens[slot]]: amounts[slot] for slot in self._holder_slots[holder_id] if amounts[slot]}
+
+    def take(self, holder: str, token: str) -> int:
+        slot = self._find(holder, token)
+        if slot is None:
+            return 0
+        amount = self._amounts[slot]
+        self._amounts[slot] = 0
+        return amount
+
+    def take_all(self, holder: str) -> dict[str, int]:
+        balances = self.awaited_all(holder)
+        holder_id = self._holder_ids.get(holder)
+        if holder_id is not None:
+            for slot in self._holder_slots[holder_id]:
+                self._amounts[slot] = 0
+        return balances
+
+    def __len__(self) -> int:
+        return len(self._amounts)
 
 
 class BridgeAdapter:
-    # holder => token => amount
-    claimable: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    _claimable: ClaimableLedger | None = None
+    _listeners: list | None = None
+
+    @property
+    def claimable(self) -> ClaimableLedger:
+        """holder => token => amount, own ledger of every adapter"""
+        if self._claimable is None:
+            self._claimable = ClaimableLedger()
+        return self._claimable
 
     def bridge(self, bridgeInstruction: BridgeInstruction):
         ...
 
+    def subscribe(self, listener) -> None:
+        """listener(adapter, for_, token, amount) is called after every received bridge"""
+        if self._listeners is None:
+            self._listeners = []
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener) -> None:
+        if self._listeners and listener in self._listeners:
+            self._listeners.remove(listener)
+
     def _receiveBridge(self, for_: str, token: str, amount: int):
-        self.claimable[for_][token] += amount
+        self.claimable.credit(for_, token, amount)
+        if self._listeners:
+            for listener in self._listeners:
+                listener(self, for_, token, amount)
 
-    def claim(self, token: str):
-        available = self.claimable["msg.sender"][token]
+    def awaited(self, holder: str, token: str | None = None) -> int | dict[str, int]:
+        """Claimable amount of token for holder, or all non-zero balances of holder if token is None"""
+        if token is None:
+            return self.claimable.awaited_all(holder)
+        return self.claimable.awaited(holder, token)
+
+    def claim(self, token: str) -> int:
+        available = self.claimable.take("msg.sender", token)
         ERC20(token).transfer("msg.sender", available)
+        return available
+
+    def claim_many(self, tokens: list[str]) -> list[int]:
+        return [self.claim(token) for token in tokens]
+
+    def claim_all(self) -> dict[str, int]:
+        """Claim every token awaiting sender, one transfer per token"""
+        claimed = self.claimable.take_all("msg.sender")
+        for token, amount in claimed.items():
+            ERC20(token).transfer("msg.sender", amount)
+        return claimed
 
 class AcrossBridgeAdapter(BridgeAdapter):
     # Certain bridge
     def handleV3AcrossMessage(self, token: str, amount: int, recipient: str, data: bytes):
-        bridgeMessage = BridgeMessage(
-            container=decode(["address"], data)[0]
-        )
+        bridgeMessage = BridgeMessage.from_bytes(data)
         self._receiveBridge(bridgeMessage.container, token, amount)
 
 class CCTPBridgeAdapter(BridgeAdapter):
     def cctpReceiveMessage(self, token: str, amount: int, recipient: str, data: bytes):
-        bridgeMessage = BridgeMessage(
-            container=decode(["address"], data)[0]
-        )
+        bridgeMessage = BridgeMessage.from_bytes(data)
         self._receiveBridge(bridgeMessage.container, token, amount)
 
 class BridgeSupport:
@@ -42,6 +151,17 @@ class BridgeSupport:
     def claim_bridge(self, bridge_adapter: BridgeAdapter, token: str):
         bridge_adapter.claim(token)
 
+    def claim_all_bridges(self, bridge_adapters: list[BridgeAdapter]) -> dict[str, int]:
+        """
+        Drain everything awaiting on given adapters.
+        :return: token => claimed amount summed over adapters
+        """
+        claimed: dict[str, int] = dict()
+        for bridge_adapter in bridge_adapters:
+            for token, amount in bridge_adapter.claim_all().items():
+                claimed[token] = claimed.get(token, 0) + amount
+        return claimed
+
     def _validate_bridge_adapter(self, bridge_adapter: BridgeAdapter):
         if bridge_adapter not in self.whitelistedBridgeAdapters:
             raise ValueError("Bridge adapter is not whitelisted")
@@ -0,0 +1,180 @@
+"""
+Bridge route optimizer: splits token amounts across bridge adapters.
+
+Every adapter is described by BridgeModel (fees, latency, fill throughput, capacity).
+Planner returns adapter and instruction lists aligned one to one, so result can be passed
+as is to PrincipalContainer.start_enter, AgentContainer.return_funds
+and AgentContainer.finish_withdrawal_processing.
+"""
+import math
+
+from bridge_adapters import BridgeAdapter
+from datastructures import BridgeInstruction
+
+
+class BridgeModel:
+    """
+    :fee_fixed: fee per bridge call, token units
+    :fee_bps: fee proportional to amount
+    :latency: expected arrival time of small transfer, seconds
+    :throughput: tokens per second adapter fills (relayer liquidity), None - no limit
+    :capacity: max amount per plan, None - no limit
+    :tokens: tokens adapter can bridge, None - any
+    """
+    def __init__(
+        self,
+        fee_fixed: int = 0,
+        fee_bps: int = 0,
+        latency: float = 0.0,
+        throughput: float | None = None,
+        capacity: int | None = None,
+        tokens: set[str] | None = None,
+    ):
+        self.fee_fixed = fee_fixed
+        self.fee_bps = fee_bps
+        self.latency = latency
+        self.throughput = throughput
+        self.capacity = capacity
+        self.tokens = tokens
+
+    def arrival_time(self, amount: int) -> float:
+        if amount == 0:
+            return 0.0
+        return self.latency + (amount / self.throughput if self.throughput else 0.0)
+
+    def fee(self, amount: int) -> int:
+        return self.fee_fixed + amount * self.fee_bps // 10_000 if amount else 0
+
+
+class BridgeRoutePlan:
+    """
+    :adapters: adapters aligned with instructions
+    :arrival_time: expected arrival of slowest leg, seconds
+    :fee: expected fee of all legs
+    """
+    adapters: list[BridgeAdapter]
+    instructions: list[BridgeInstruction]
+    arrival_time: float
+    fee: int
+
+    def __init__(self):
+        self.adapters = []
+        self.instructions = []
+        self.arrival_time = 0.0
+        self.fee = 0
+
+    def add(self, adapter: BridgeAdapter, model: BridgeModel, token: str, amount: int, payload: bytes) -> None:
+        self.adapters.append(adapter)
+        self.instructions.append(BridgeInstruction(token=token, amount=amount, payload=payload))
+        self.arrival_time = max(self.arrival_time, model.arrival_time(amount))
+        self.fee += model.fee(amount)
+
+    def __len__(self) -> int:
+        return len(self.instructions)
+
+
+class BridgeRoutePlanner:
+    """
+    :objective: "time" - minimize arrival of slowest leg, "cost" - minimize fees
+    """
+    TIME = "time"
+    COST = "cost"
+
+    def __init__(self, models: dict[BridgeAdapter, BridgeModel], objective: str = TIME):
+        if objective not in (self.TIME, self.COST):
+            raise ValueError("Unknown objective")
+        self.models = models
+        self.objective = objective
+
+    def plan(self, amounts: dict[str, int], payload: bytes = bytes()) -> BridgeRoutePlan:
+        """
+        Split every token amount across adapters able to bridge it.
+        Capacity is shared by all tokens of one plan.
+        """
+        remaining = {adapter: model.capacity for adapter, model in self.models.items()}
+        plan = BridgeRoutePlan()
+        for token, amount in amounts.items():
+            if amount == 0:
+                continue
+            adapters = [
+                adapter for adapter, model in self.models.items()
+                if (model.tokens is None or token in model.tokens) and remaining[adapter] != 0
+            ]
+            if sum(math.inf if remaining[adapter] is None else remaining[adapter] for adapter in adapters) < amount:
+                raise ValueError(f"Not enough bridge capacity for token {token}")
+            split = self._split_by_time(adapters, remaining, amount) if self.objective == self.TIME else self._split_by_cost(adapters, remaining, amount)
+            for adapter, part in split.items():
+                if part:
+                    plan.add(adapter, self.models[adapter], token, part, payload)
+                    if remaining[adapter] is not None:
+                        remaining[adapter] -= part
+        return plan
+
+    def _split_by_cost(self, adapters: list[BridgeAdapter], remaining: dict, amount: int) -> dict[BridgeAdapter, int]:
+        """Fill cheapest marginal fee first, fixed fee breaks ties"""
+        split = dict()
+        for adapter in sorted(adapters, key=lambda adapter: (self.models[adapter].fee_bps, self.models[adapter].fee_fixed)):
+            part = amount if remaining[adapter] is None else min(amount, remaining[adapter])
+            split[adapter] = part
+            amount -= part
+            if amount == 0:
+                break
+        return split
+
+    def _split_by_time(self, adapters: list[BridgeAdapter], remaining: dict, amount: int) -> dict[BridgeAdapter, int]:
+        """
+        Water filling: find earliest time T when adapters started by T can carry amount,
+        adapter leg carries min(capacity, (T - latency) * throughput). Unlimited throughput adapters
+        take whatever is left at their latency.
+        """
+        models = self.models
+
+        def carried(deadline: float) -> float:
+            total = 0.0
+            for adapter in adapters:
+                model, capacity = models[adapter], remaining[adapter]
+                if deadline < model.latency:
+                    continue
+                part = (deadline - model.latency) * model.throughput if model.throughput else math.inf
+                total += part if capacity is None else min(part, capacity)
+            return total
+
+        low = min(models[adapter].latency for adapter in adapters)
+        high = max(
+            models[adapter].arrival_time(amount if remaining[adapter] is None else min(amount, remaining[adapter]))
+            for adapter in adapters
+        )
+        for _ in range(64):
+            middle = (low + high) / 2
+            if carried(middle) >= amount:
+                high = middle
+            else:
+                low = middle
+
+        split = dict()
+        left = amount
+        unlimited = []
+        for adapter in sorted(adapters, key=lambda adapter: models[adapter].latency):
+            model, capacity = models[adapter], remaining[adapter]
+            if high < model.latency:
+                continue
+            if not model.throughput:
+                unlimited.append(adapter)
+                continue
+            part = min(int((high - model.latency) * model.throughput), left)
+            if capacity is not None:
+                part = min(part, capacity)
+            split[adapter] = part
+            left -= part
+        for adapter in unlimited:
+            part = left if remaining[adapter] is None else min(left, remaining[adapter])
+            split[adapter] = part
+            left -= part
+        # rounding leftovers go to adapters with room, fastest first
+        for adapter in sorted(adapters, key=lambda adapter: models[adapter].latency):
+            if left == 0:
+                break
+            room = left if remaining[adapter] is None else min(left, remaining[adapter] - split.get(adapter, 0))
+            split[adapter] = split.get(adapter, 0) + room
+            left -= room
+        return split
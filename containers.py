@@ -7,11 +7,19 @@ from datastructures import (
     WithdrawalRequest,
     WithdrawalResponse,
     SuccessDepositConfirmation,
-    ContainerMessage
+    ContainerMessage,
+    EnterInstruction,
+    MessageEnvelope,
+    MessageType,
 )
+from message_codecs import ENVELOPE
+from read_cache import ReadCacheSupport
 from messaging import Message, Messaging
-from swap_router import SwapRouter
+from swap_router import SwapNetting, SwapRouter, net_swaps
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Generic, TypeVar
+import time
 
 T = TypeVar('T')
 
@@ -45,7 +53,23 @@ class Logic:
     def underlying_liquidity_amount(self) -> int:
         return 0
 
-class ExecutionSupport:
+class EnterLogicsReport:
+    """
+    Result of ExecutionSupport.enter_logics.
+
+    :deltas: logic => nav after enters - nav after harvest
+    :timings: logic => {"harvest", "nav_before", "enter", "nav_after"} seconds
+    """
+    def __init__(self):
+        self.deltas: dict[Logic, int] = dict()
+        self.timings: dict[Logic, dict[str, float]] = dict()
+
+    @property
+    def total_delta(self) -> int:
+        return sum(self.deltas.values())
+
+
+class ExecutionSupport(ReadCacheSupport):
     logics: dict[Logic, bool] = dict()
 
     nav_after_harvest: int = 0
@@ -67,14 +91,75 @@ class ExecutionSupport:
         if not self.logics[logic]:
             raise ValueError("Logic is not whitelisted")
         logic.harvest()
-        self.nav_after_harvest += logic.nav()
+        self._logic_changed(logic)
+        self.nav_after_harvest += self._nav(logic)
         logic.enter(tokens, amounts)
-        self.nav_after_harvest_and_enter += logic.nav()
+        self._logic_changed(logic)
+        self.nav_after_harvest_and_enter += self._nav(logic)
         delta = self.nav_after_harvest_and_enter - self.nav_after_harvest
         if delta < min_liquidity_delta:
             raise ValueError("Slippage failed")
         return delta
 
+    def enter_logics(
+        self,
+        plan: list[EnterInstruction],
+        min_total_liquidity_delta: int = 0,
+        max_workers: int | None = None,
+    ) -> EnterLogicsReport:
+        """
+        Enter many logics in phases: harvest all, nav snapshot per logic, all enters, nav snapshot per logic.
+        Enters of one logic run in plan order, min_liquidity_delta of them is summed and checked
+        against logic delta; min_total_liquidity_delta is checked against sum of deltas.
+        nav_after_harvest / nav_after_harvest_and_enter are accumulated once per logic after checks passed.
+        With max_workers every phase runs on thread pool across logics (I/O-bound logics).
+        """
+        enters: dict[Logic, list[EnterInstruction]] = dict()
+        for instruction in plan:
+            if not self.logics[instruction.logic]:
+                raise ValueError("Logic is not whitelisted")
+            enters.setdefault(instruction.logic, []).append(instruction)
+        report = EnterLogicsReport()
+        for logic in enters:
+            report.timings[logic] = dict()
+
+        def timed(phase: str, logic: Logic, call):
+            started = time.perf_counter()
+            result = call()
+            report.timings[logic][phase] = time.perf_counter() - started
+            return result
+
+        def enter_all(logic: Logic) -> None:
+            for instruction in enters[logic]:
+                logic.enter(instruction.tokens, instruction.amounts)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers else None
+        run = executor.map if executor is not None else map
+        try:
+            logics = list(enters)
+            list(run(lambda logic: timed("harvest", logic, logic.harvest), logics))
+            for logic in logics:
+                self._logic_changed(logic)
+            navs_before = list(run(lambda logic: timed("nav_before", logic, lambda: self._nav(logic)), logics))
+            list(run(lambda logic: timed("enter", logic, lambda: enter_all(logic)), logics))
+            for logic in logics:
+                self._logic_changed(logic)
+            navs_after = list(run(lambda logic: timed("nav_after", logic, lambda: self._nav(logic)), logics))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        for logic, nav_before, nav_after in zip(logics, navs_before, navs_after):
+            delta = nav_after - nav_before
+            if delta < sum(instruction.min_liquidity_delta for instruction in enters[logic]):
+                raise ValueError("Slippage failed")
+            report.deltas[logic] = delta
+        if report.total_delta < min_total_liquidity_delta:
+            raise ValueError("Slippage failed")
+        self.nav_after_harvest += sum(navs_before)
+        self.nav_after_harvest_and_enter += sum(navs_after)
+        return report
+
     def exit_logic(
         self,
         logic: Logic,
@@ -83,16 +168,13 @@ class ExecutionSupport:
     ) -> None:
         if not self.logics[logic]:
             raise ValueError("Logic is not whitelisted")
-        deltas = []
-        for token in expected_tokens:
-            deltas.append(
-                token.balanceOf("address(this)")
-            )
-        logic_lps = logic.underlying_liquidity_amount()
+        deltas = self._balances_of(expected_tokens)
+        logic_lps = self._underlying_liquidity_amount(logic)
         amount_for_withdraw = (logic_lps * self.current_shares_for_withdrawal) // self.current_total_shares
         logic.exit(liquidity_decrease=amount_for_withdraw)
-        for i, token in enumerate(expected_tokens):
-            token_delta = token.balanceOf("address(this)") - deltas[i]
+        self._logic_changed(logic)
+        for i, balance in enumerate(self._balances_of(expected_tokens)):
+            token_delta = balance - deltas[i]
             if token_delta < min_tokens_deltas[i]:
                 raise ValueError("Slippage failed")
 
@@ -106,12 +188,14 @@ class ExecutionSupport:
 
 
 
-class Container:
+class Container(ReadCacheSupport):
     swap_router: SwapRouter
     vault: Address
     notion: ERC20
     operator: Address
     address: str = "0x0000000000000000000000000000000000000002"
+    swap_netting: bool = False # opt-in: net swaps of prepare_liquidity, see swap_router.net_swaps
+    last_swap_netting: SwapNetting | None = None
 
     def __init__(self, swap_router: SwapRouter, notion: ERC20) -> None:
         self.swap_router = swap_router
@@ -120,9 +204,19 @@ class Container:
     def prepare_liquidity(self, swaps: list[SwapInstruction]):
         """
         Do some swaps before some actions.
+        With swap_netting swaps are netted first (see swap_router.net_swaps), report is kept in last_swap_netting.
         """
+        if self.swap_netting:
+            self.last_swap_netting = net_swaps(swaps)
+            swaps = self.last_swap_netting.swaps
         for swap in swaps:
             self.swap_router.swap(swap)
+            self._tokens_changed([swap.token_in, swap.token_out])
+
+    def _bridge(self, bridge_adapter: BridgeAdapter, instruction: BridgeInstruction) -> None:
+        """Send funds through bridge adapter, bridged token leaves container"""
+        bridge_adapter.bridge(instruction)
+        self._tokens_changed([getattr(instruction.token, "address", instruction.token)])
 
     def start_withdrawal(self, batch_shares: int, total_shares: int) -> None:
         ...
@@ -135,25 +229,31 @@ class PrincipalContainer(Container, Messaging, BridgeSupport):
     def __init__(self, vault: "Vault", swap_router: SwapRouter, notion: ERC20) -> None:
         Container.__init__(self, swap_router, notion)
         self.vault = vault
+        # batches in flight on this container in start order and their confirmations by batch id
+        self._enter_batch_ids: deque = deque()
+        self._deposit_confirmations: dict[int | None, tuple[int, int]] = dict()
 
     # Enter processing
     def start_enter(
         self,
         swaps: list[SwapInstruction],
         bridge_adapters: list[BridgeAdapter],
-        bridge_instructions: list[BridgeInstruction]
+        bridge_instructions: list[BridgeInstruction],
+        batch_id: int | None = None,
     ) -> None:
         """
         Start enter processing on principal side.
         Awaits amount of notion tokens on Principal contract
         Can process optional swaps and bridges for sending funds to remote container's Agent
+        batch_id is passed back to vault in finalize_enter, so several batches can be in flight
         """
         if len(bridge_adapters) != len(bridge_instructions):
             raise ValueError("bridge_adapters and bridge_instructions must have same length")
+        self._enter_batch_ids.append(batch_id)
 
         self.prepare_liquidity(swaps)
         for i, instruction in enumerate(bridge_instructions):
-            bridge_adapters[i].bridge(instruction)
+            self._bridge(bridge_adapters[i], instruction)
 
     def _claim_deposit_confirmation(self, message: SuccessDepositConfirmation) -> None:
         """
@@ -165,32 +265,47 @@ class PrincipalContainer(Container, Messaging, BridgeSupport):
         """
         self.container_nav_after_harvest = message.nav_after_harvest
         self.container_nav_after_enter = message.nav_after_harvest_and_enter
+        self._deposit_confirmations[message.batch_id] = (message.nav_after_harvest, message.nav_after_harvest_and_enter)
 
     def finalize_enter(
         self,
         bridge_adapters: list[BridgeAdapter],
         swaps: list[SwapInstruction],
+        batch_id: int | None = None,
     ) -> None:
         """
         After receiving deposit confirmation (cross-chain message) and bridge receiving bridge adapters,
         possible to claim tokens, swap it (if necessary) into notion token and execute callback on vault
         for unlock batch actions for users (user actions - claim shares or notion tokens from failed batch)
         As a result - we should have nav growth and notion token remainder
+        :param batch_id: batch to finalize, oldest started batch by default; its confirmation is looked up by id,
+            failed batch has no confirmation and reports only remainder; raises if there is neither
         """
+        if batch_id is None and self._enter_batch_ids:
+            batch_id = self._enter_batch_ids[0]
+        nav_after_harvest, nav_after_enter = self._deposit_confirmations.get(batch_id, (0, 0))
         for bridge_adapter in bridge_adapters:
             self.claim_bridge(bridge_adapter=bridge_adapter, token=Address(self.notion))
-        notion_before = self.notion.balanceOf("address(this)")
+        notion_before, = self._balances_of([self.notion])
         self.prepare_liquidity(swaps) # swap to notion
-        notion_after = self.notion.balanceOf("address(this)")
+        notion_after, = self._balances_of([self.notion])
+        if batch_id not in self._deposit_confirmations and notion_after == notion_before:
+            raise Exception("No deposit confirmation or remainder for batch")
 
         # transfer notion if exists?
         self.vault.deposit_container_callback(
-            nav_after_harvest=self.container_nav_after_harvest,
-            nav_after_harvest_and_enter=self.container_nav_after_enter,
+            nav_after_harvest=nav_after_harvest,
+            nav_after_harvest_and_enter=nav_after_enter,
             notion_token_remainder=notion_after - notion_before,
+            batch_id=batch_id,
+            container=self,
         )
+        self._deposit_confirmations.pop(batch_id, None)
+        if batch_id in self._enter_batch_ids:
+            self._enter_batch_ids.remove(batch_id)
         if notion_after - notion_before > 0:
             self.notion.transfer(self.vault, notion_after - notion_before)
+            self._tokens_changed([self.notion.address])
 
 
     def start_withdrawal(self, batch_shares: int, total_shares: int) -> None:
@@ -208,7 +323,7 @@ class PrincipalContainer(Container, Messaging, BridgeSupport):
         )
         self.send_message(withdrawal_message)
 
-    def _claim_withdrawal_response(self) -> None:
+    def _claim_withdrawal_response(self, message: WithdrawalResponse) -> None:
         ...
 
 
@@ -218,39 +333,65 @@ class PrincipalContainer(Container, Messaging, BridgeSupport):
             tokens: list[ERC20],
             swaps: list[SwapInstruction]
     ) -> None:
-        notion_token_before = self.notion.balanceOf("address(this)")
+        notion_token_before, = self._balances_of([self.notion])
         for i, bridge_adapter in enumerate(bridge_adapters):
             bridge_adapter.claim(token=tokens[i])
+        self._tokens_changed([getattr(token, "address", token) for token in tokens])
         self.prepare_liquidity(swaps)
-        notion_token_after = self.notion.balanceOf("address(this)")
+        notion_token_after, = self._balances_of([self.notion])
         self.vault.withdrawal_container_callback(
-            notion_growth=notion_token_after - notion_token_before
+            notion_growth=notion_token_after - notion_token_before,
+            container=self,
         )
 
 
     def receive_message(self, message: bytes):
-        if type(message) is SuccessDepositConfirmation:
-            message = SuccessDepositConfirmation.from_bytes(message)
-            self._claim_deposit_confirmation(message)
-        elif type(message) is WithdrawalResponse:
-            message = WithdrawalResponse.from_bytes(message)
-            self._claim_withdrawal_response(message)
+        """
+        Receive ABI encoded ContainerMessage or MessageEnvelope with many container messages
+        """
+        if ENVELOPE.is_envelope(message):
+            self.receive_envelope(message)
+        else:
+            self._dispatch_message(ContainerMessage.from_bytes(message))
+
+    def receive_envelope(self, envelope: bytes) -> None:
+        """Messages are decoded lazily from envelope and dispatched in one loop"""
+        for message in MessageEnvelope.from_bytes(envelope):
+            self._dispatch_message(message)
+
+    def _dispatch_message(self, message: ContainerMessage) -> None:
+        if message.type is MessageType.DEPOSIT_CONFIRMATION:
+            self._claim_deposit_confirmation(SuccessDepositConfirmation.from_bytes(message.payload))
+        elif message.type is MessageType.WITHDRAWAL_RESPONSE:
+            self._claim_withdrawal_response(WithdrawalResponse.from_bytes(message.payload))
 
     def claim_bridge(self, bridge_adapter: BridgeAdapter, token: ERC20) -> None:
         self._validate_bridge_adapter(bridge_adapter)
         bridge_adapter.claim(token)
+        self._tokens_changed([getattr(token, "address", token)])
 
 class AgentContainer(Container, BridgeSupport, Messaging, ExecutionSupport):
-    def finalize_success_enters(self) -> None: # need bridge?
+    def claim_bridge(self, bridge_adapter: BridgeAdapter, token: str) -> None:
+        BridgeSupport.claim_bridge(self, bridge_adapter, token)
+        self._tokens_changed([getattr(token, "address", token)])
+
+    def claim_all_bridges(self, bridge_adapters: list[BridgeAdapter]) -> dict[str, int]:
+        claimed = BridgeSupport.claim_all_bridges(self, bridge_adapters)
+        self._tokens_changed(list(claimed))
+        return claimed
+
+    def finalize_success_enters(self, batch_id: int | None = None) -> None: # need bridge?
         """
         Send callback about success enters
         Sent parameters:
         * nav_after_harvest - nav after harvest in all logics
         * nav after enter - nav after harvest in all logics and enters
+        * batch_id - deposit batch the enters belong to
         """
         callback = SuccessDepositConfirmation(
             nav_after_harvest=self.nav_after_harvest,
             nav_after_harvest_and_enter=self.nav_after_harvest_and_enter,
+            batch_id=batch_id,
         )
         self.nav_after_harvest = 0
         self.nav_after_harvest_and_enter = 0
@@ -268,7 +409,7 @@ class AgentContainer(Container, BridgeSupport, Messaging, ExecutionSupport):
         # TODO: think about some verifications (message with amounts or something like this)
 
         for i, bridge_adapter in enumerate(bridge_adapters):
-            bridge_adapter.bridge(bridge_instructions[i])
+            self._bridge(bridge_adapter, bridge_instructions[i])
 
     def finish_withdrawal_processing(
         self,
@@ -279,7 +420,7 @@ class AgentContainer(Container, BridgeSupport, Messaging, ExecutionSupport):
         self._finish_withdrawal()
         self.prepare_liquidity(swaps)
         for i, bridge_adapter in enumerate(bridge_adapters):
-            bridge_adapter.bridge(bridges[i])
+            self._bridge(bridge_adapter, bridges[i])
 
     def receive_message(self, message: Message) -> None:
         if type(message) is WithdrawalRequest:
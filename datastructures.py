@@ -1,6 +1,10 @@
+from array import array
 from enum import Enum
+from operator import add
 from typing import TypeVar, Generic
-from eth_abi import encode, decode
+
+from errors import MessageQueueFull
+from message_codecs import ADDRESS, ENVELOPE, UINT256_PAIR, UINT256_TRIPLE, UINT8_BYTES
 
 class MessageType(Enum):
     DEPOSIT_CONFIRMATION = 0
@@ -9,7 +13,8 @@ class MessageType(Enum):
 
 # Messages
 class Message:
-    def from_bytes(self, raw: bytes) -> "Message":
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "Message":
         raise NotImplementedError()
 
     def to_bytes(self) -> bytes:
@@ -20,55 +25,130 @@ class ContainerMessage(Message):
     payload: bytes
 
     def to_bytes(self) -> bytes:
-        return encode(["uint8", "bytes"], [self.type.value, self.payload])
+        return UINT8_BYTES.encode(self.type.value, self.payload)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "ContainerMessage":
+        type_, payload = UINT8_BYTES.decode(raw)
+        return ContainerMessage(type=MessageType(type_), data=payload)
 
     def __init__(self, type: MessageType, data: bytes):
         self.type = type
         self.payload = data
 
+class MessageEnvelope(Message):
+    """
+    Many container messages in one cross-chain delivery.
+    Built from a list on sender side; on receiver side wraps raw bytes
+    and decodes messages one by one while iterating, payloads are memoryviews into raw bytes.
+    """
+    messages: list[ContainerMessage] | None
+    raw: memoryview | None
+
+    def to_bytes(self) -> bytes:
+        if self.raw is not None:
+            return bytes(self.raw)
+        return ENVELOPE.encode([(message.type.value, message.payload) for message in self.messages])
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "MessageEnvelope":
+        envelope = MessageEnvelope()
+        envelope.messages = None
+        envelope.raw = memoryview(raw)
+        return envelope
+
+    def __iter__(self):
+        if self.raw is None:
+            return iter(self.messages)
+        return (
+            ContainerMessage(type=MessageType(type_), data=payload)
+            for type_, payload in ENVELOPE.iter_records(self.raw)
+        )
+
+    def __len__(self) -> int:
+        if self.raw is None:
+            return len(self.messages)
+        return ENVELOPE.count(self.raw)
+
+    def __init__(self, messages: list[ContainerMessage] | None = None):
+        self.messages = messages if messages is not None else []
+        self.raw = None
+
 class BridgeMessage(Message):
     container: str
 
-    def from_bytes(self, raw: bytes) -> "BridgeMessage":
-        decoded = decode(["address"], raw)[0]
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "BridgeMessage":
+        decoded = ADDRESS.decode(raw)[0]
         return BridgeMessage(container=decoded)
 
     def to_bytes(self) -> bytes:
-        return encode(["address"], [self.container])
+        return ADDRESS.encode(self.container)
 
     def __init__(self, container: str):
         self.container = container
 
 class SuccessDepositConfirmation(Message):
+    """
+    :batch_id: deposit batch confirmed, None - batch not specified (NO_BATCH_ID on wire)
+    """
     nav_after_harvest: int = 0
     nav_after_harvest_and_enter: int = 0
+    batch_id: int | None = None
+    NO_BATCH_ID: int = 2 ** 256 - 1
 
     def to_bytes(self) -> bytes:
-        return encode(["uint256", "uint256"], [self.nav_after_harvest, self.nav_after_harvest_and_enter])
+        batch_id = self.NO_BATCH_ID if self.batch_id is None else self.batch_id
+        return UINT256_TRIPLE.encode(self.nav_after_harvest, self.nav_after_harvest_and_enter, batch_id)
 
-    def from_bytes(self, raw: bytes) -> "SuccessDepositConfirmation":
-        nav_after_harvest, nav_after_harvest_and_enter = decode(["uint256", "uint256"], raw)
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "SuccessDepositConfirmation":
+        nav_after_harvest, nav_after_harvest_and_enter, batch_id = UINT256_TRIPLE.decode(raw)
         return SuccessDepositConfirmation(
             nav_after_harvest=nav_after_harvest,
             nav_after_harvest_and_enter=nav_after_harvest_and_enter,
+            batch_id=None if batch_id == cls.NO_BATCH_ID else batch_id,
         )
 
-    def __init__(self, nav_after_harvest: int, nav_after_harvest_and_enter: int):
+    def __init__(self, nav_after_harvest: int, nav_after_harvest_and_enter: int, batch_id: int | None = None):
         self.nav_after_harvest = nav_after_harvest
         self.nav_after_harvest_and_enter = nav_after_harvest_and_enter
+        self.batch_id = batch_id
 
 class WithdrawalRequest(Message):
     shares_for_withdrawal: int
     total_shares: int
 
-    def __init__(self, container: str, shares_for_withdrawal: int, total_shares: int):
+    def to_bytes(self) -> bytes:
+        return UINT256_PAIR.encode(self.shares_for_withdrawal, self.total_shares)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "WithdrawalRequest":
+        shares_for_withdrawal, total_shares = UINT256_PAIR.decode(raw)
+        return WithdrawalRequest(
+            shares_for_withdrawal=shares_for_withdrawal,
+            total_shares=total_shares,
+        )
+
+    def __init__(self, shares_for_withdrawal: int, total_shares: int, container: str = ""):
         self.shares_for_withdrawal = shares_for_withdrawal
         self.total_shares = total_shares
 
-class WithdrawalResponse:
+class WithdrawalResponse(Message):
     nav_after_harvest: int
     nav_after_harvest_and_enter: int
 
+    def to_bytes(self) -> bytes:
+        return UINT256_PAIR.encode(self.nav_after_harvest, self.nav_after_harvest_and_enter)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "WithdrawalResponse":
+        nav_after_harvest, nav_after_harvest_and_enter = UINT256_PAIR.decode(raw)
+        return WithdrawalResponse(
+            nav_after_harvest=nav_after_harvest,
+            nav_after_harvest_and_enter=nav_after_harvest_and_enter,
+        )
+
     def __init__(self, nav_after_harvest: int, nav_after_harvest_and_enter: int):
         self.nav_after_harvest = nav_after_harvest
         self.nav_after_harvest_and_enter = nav_after_harvest_and_enter
@@ -89,6 +169,285 @@ class Position:
         self.withdrawal_batch_id = 0
 
 
+class PositionColumn:
+    """PositionView attribute backed by PositionTable column of same name"""
+    __slots__ = ("name",)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, view: "PositionView", owner: type = None) -> int:
+        if view is None:
+            return self
+        return view._table.__dict__[self.name][view._id]
+
+    def __set__(self, view: "PositionView", value: int) -> None:
+        try:
+            view._table.__dict__[self.name][view._id] = value
+        except OverflowError:
+            view._table._promote(self.name)[view._id] = value
+
+
+class IndexedPositionColumn(PositionColumn):
+    """Column PositionTable keeps an index over, read-only through view"""
+    __slots__ = ()
+
+    def __set__(self, view: "PositionView", value: int) -> None:
+        raise AttributeError(f"{self.name} is indexed and can not be changed")
+
+
+class PositionView:
+    """
+    Lightweight proxy over one row of PositionTable.
+    Reads and writes go straight to the table columns, so the view
+    behaves like Position but owns no data.
+    """
+    __slots__ = ("_table", "_id")
+
+    notion_amount = PositionColumn()
+    shares_amount = PositionColumn()
+    locked_shares_amount = PositionColumn()
+    deposit_batch_id = IndexedPositionColumn()
+    withdrawal_batch_id = PositionColumn()
+
+    def __init__(self, table: "PositionTable", position_id: int):
+        self._table = table
+        self._id = position_id
+
+    @property
+    def owner(self) -> "Address":
+        return self._table.owner_of(self._id)
+
+
+class PositionOwners:
+    """Read-only position_id -> owner mapping over PositionTable.owner column"""
+    __slots__ = ("_table",)
+
+    def __init__(self, table: "PositionTable"):
+        self._table = table
+
+    def __getitem__(self, position_id: int) -> "Address":
+        return self._table.owner_of(position_id)
+
+    def __contains__(self, position_id: int) -> bool:
+        return position_id in self._table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+class PositionTable:
+    """
+    Struct-of-arrays storage for vault positions.
+    Position id is the row index: positions are append-only and ids are sequential.
+
+    Numeric columns start as unsigned 64-bit arrays and are promoted to plain
+    lists of python ints the first time a value does not fit (uint256 amounts),
+    so integer semantics stay exact.
+    Owners are interned: the owner column keeps a small integer per row.
+
+    Secondary indexes are maintained incrementally:
+    deposit batch id -> range of position ids, owner -> position ids,
+    withdrawal batch id -> position ids with unclaimed withdrawal.
+
+    :notion_amount: notion tokens deposited and not yet converted into shares
+    :shares_amount: claimed unlocked shares
+    :locked_shares_amount: shares locked in withdrawal requests
+    :deposit_batch_id: deposit batch of position
+    :withdrawal_batch_id: last withdrawal batch of position
+    :owner: interned owner id
+    """
+    COLUMNS = (
+        "notion_amount",
+        "shares_amount",
+        "locked_shares_amount",
+        "deposit_batch_id",
+        "withdrawal_batch_id",
+    )
+
+    def __init__(self):
+        self.notion_amount = array("Q")
+        self.shares_amount = array("Q")
+        self.locked_shares_amount = array("Q")
+        self.deposit_batch_id = array("Q")
+        self.withdrawal_batch_id = array("Q")
+        self.owner = array("I")
+        self._owner_addresses: list = []
+        self._owner_ids: dict = dict()
+        self._deposit_batch_index: dict[int, range] = dict()
+        self._owner_index: dict[int, array] = dict()
+        self._withdrawal_batch_index: dict[int, dict[int, None]] = dict()
+
+    def __len__(self) -> int:
+        return len(self.owner)
+
+    def __contains__(self, position_id: int) -> bool:
+        return 0 <= position_id < len(self.owner)
+
+    def __iter__(self):
+        return iter(range(len(self.owner)))
+
+    def __getitem__(self, position_id: int) -> PositionView:
+        if position_id not in self:
+            raise KeyError(position_id)
+        return PositionView(self, position_id)
+
+    def __setitem__(self, position_id: int, position: Position) -> None:
+        """
+        Overwrite existing row from Position object.
+        New rows are added with append (owner is required), deposit batch of row can not change:
+        both are kept in indexes.
+        """
+        if position_id not in self:
+            raise KeyError(position_id)
+        if position.deposit_batch_id != self.deposit_batch_id[position_id]:
+            raise ValueError("Deposit batch of position can not change")
+        for column in self.COLUMNS:
+            self._set(column, position_id, getattr(position, column))
+
+    def keys(self):
+        return range(len(self.owner))
+
+    def values(self):
+        return (PositionView(self, i) for i in range(len(self.owner)))
+
+    def items(self):
+        return ((i, PositionView(self, i)) for i in range(len(self.owner)))
+
+    @property
+    def owners(self) -> PositionOwners:
+        return PositionOwners(self)
+
+    def append(self, owner: "Address", notion_amount: int, deposit_batch_id: int) -> int:
+        """
+        Add new position row
+        :return: position id
+        """
+        position_id = len(self.owner)
+        try:
+            self.notion_amount.append(notion_amount)
+        except OverflowError:
+            self._promote("notion_amount").append(notion_amount)
+        try:
+            self.deposit_batch_id.append(deposit_batch_id)
+        except OverflowError:
+            self._promote("deposit_batch_id").append(deposit_batch_id)
+        # zero fits any column type
+        self.shares_amount.append(0)
+        self.locked_shares_amount.append(0)
+        self.withdrawal_batch_id.append(0)
+        owner_id = self._intern_owner(owner)
+        self.owner.append(owner_id)
+
+        batch_positions = self._deposit_batch_index.get(deposit_batch_id)
+        if batch_positions is None:
+            self._deposit_batch_index[deposit_batch_id] = range(position_id, position_id + 1)
+        else:
+            self._deposit_batch_index[deposit_batch_id] = range(batch_positions.start, position_id + 1)
+        owned = self._owner_index.get(owner_id)
+        if owned is None:
+            owned = self._owner_index[owner_id] = array("Q")
+        owned.append(position_id)
+        return position_id
+
+    def owner_of(self, position_id: int) -> "Address":
+        if position_id not in self:
+            raise KeyError(position_id)
+        return self._owner_addresses[self.owner[position_id]]
+
+    def to_position(self, position_id: int) -> Position:
+        """Materialize row as standalone Position object"""
+        position = Position(
+            notion_amount=self.notion_amount[position_id],
+            deposit_batch_id=self.deposit_batch_id[position_id],
+        )
+        position.shares_amount = self.shares_amount[position_id]
+        position.locked_shares_amount = self.locked_shares_amount[position_id]
+        position.withdrawal_batch_id = self.withdrawal_batch_id[position_id]
+        return position
+
+    def deposit_batch_range(self, batch_id: int) -> range:
+        """
+        Position ids of deposit batch.
+        Batch ids only grow while positions are appended, so every batch is a contiguous run of rows.
+        """
+        return self._deposit_batch_index.get(batch_id, range(0))
+
+    def owner_positions(self, owner: "Address") -> list[int]:
+        owner_id = self._owner_ids.get(owner)
+        if owner_id is None:
+            return []
+        return self._owner_index[owner_id].tolist()
+
+    def withdrawal_batch_positions(self, batch_id: int) -> list[int]:
+        return list(self._withdrawal_batch_index.get(batch_id, ()))
+
+    def add_to_withdrawal_batch(self, position_id: int, batch_id: int) -> None:
+        self._set("withdrawal_batch_id", position_id, batch_id)
+        batch_positions = self._withdrawal_batch_index.get(batch_id)
+        if batch_positions is None:
+            batch_positions = self._withdrawal_batch_index[batch_id] = dict()
+        batch_positions[position_id] = None
+
+    def remove_from_withdrawal_batch(self, position_id: int, batch_id: int) -> None:
+        batch_positions = self._withdrawal_batch_index.get(batch_id)
+        if batch_positions is None:
+            return
+        batch_positions.pop(position_id, None)
+        if not batch_positions:
+            del self._withdrawal_batch_index[batch_id]
+
+    def remove_from_owner(self, position_id: int) -> None:
+        """Drop position from owner index (position closed), row itself stays for history"""
+        owned = self._owner_index.get(self.owner[position_id])
+        if owned is not None and position_id in owned:
+            owned.remove(position_id)
+
+    def settle_shares(self, positions: range, batch_total_shares: int, batch_nav: int) -> int:
+        """
+        Convert notion amount of every position in range into shares in one pass:
+        shares += notion_amount * batch_total_shares // batch_nav, notion_amount = 0.
+        Already settled positions have zero notion amount and keep their shares.
+        :return: total shares settled
+        """
+        start, stop = positions.start, positions.stop
+        notion_amounts = self.notion_amount[start:stop]
+        user_shares = [amount * batch_total_shares // batch_nav for amount in notion_amounts]
+        self._assign("shares_amount", start, stop, list(map(add, self.shares_amount[start:stop], user_shares)))
+        self._assign("notion_amount", start, stop, [0] * (stop - start))
+        return sum(user_shares)
+
+    def _intern_owner(self, owner: "Address") -> int:
+        owner_id = self._owner_ids.get(owner)
+        if owner_id is None:
+            owner_id = len(self._owner_addresses)
+            self._owner_ids[owner] = owner_id
+            self._owner_addresses.append(owner)
+        return owner_id
+
+    def _set(self, column: str, position_id: int, value: int) -> None:
+        try:
+            getattr(self, column)[position_id] = value
+        except OverflowError:
+            self._promote(column)[position_id] = value
+
+    def _assign(self, column: str, start: int, stop: int, values: list) -> None:
+        values_column = getattr(self, column)
+        if type(values_column) is list:
+            values_column[start:stop] = values
+            return
+        try:
+            values_column[start:stop] = array(values_column.typecode, values)
+        except OverflowError:
+            self._promote(column)[start:stop] = values
+
+    def _promote(self, column: str) -> list:
+        """Value does not fit into uint64 (or is negative): switch column to python ints"""
+        promoted = getattr(self, column).tolist()
+        setattr(self, column, promoted)
+        return promoted
+
+
 class Instruction:
     ...
 
@@ -117,6 +476,21 @@ class SwapInstruction(Instruction):
         self.token_out = token_out
         self.payload = payload
 
+class EnterInstruction(Instruction):
+    """
+    Enter into one logic on agent side, arguments of ExecutionSupport.enter_logic
+    """
+    logic: "Logic"
+    tokens: list["ERC20"]
+    amounts: list[int]
+    min_liquidity_delta: int
+
+    def __init__(self, logic: "Logic", tokens: list["ERC20"], amounts: list[int], min_liquidity_delta: int):
+        self.logic = logic
+        self.tokens = tokens
+        self.amounts = amounts
+        self.min_liquidity_delta = min_liquidity_delta
+
 # Batches
 class DepositBatch:
     """
@@ -133,6 +507,57 @@ class DepositBatch:
         self.id_ = 0
         self.buffered_amount = 0
 
+class CallbackBitmap:
+    """
+    Containers which sent callback for batch, bit i - container with index i in Vault.containerIndexes.
+    mark / received / complete are O(1), missing walks over unset bits only.
+
+    :bits: received callbacks
+    :count: number of set bits
+    """
+    bits: int = 0
+    count: int = 0
+
+    def mark(self, index: int) -> None:
+        bit = 1 << index
+        if self.bits & bit:
+            raise Exception("Container callback already received")
+        self.bits |= bit
+        self.count += 1
+
+    def received(self, index: int) -> bool:
+        return bool(self.bits >> index & 1)
+
+    def complete(self, size: int) -> bool:
+        return self.count == size
+
+    def first_missing(self, size: int) -> int | None:
+        unset = ~self.bits & ((1 << size) - 1)
+        return (unset & -unset).bit_length() - 1 if unset else None
+
+    def missing(self, size: int) -> list[int]:
+        unset = ~self.bits & ((1 << size) - 1)
+        indexes = []
+        while unset:
+            lowest = unset & -unset
+            indexes.append(lowest.bit_length() - 1)
+            unset ^= lowest
+        return indexes
+
+    def reset(self) -> None:
+        self.bits = 0
+        self.count = 0
+
+    def mark_all(self, bits: int) -> None:
+        """Mark every container of bits, already received ones are kept"""
+        self.bits |= bits
+        self.count = self.bits.bit_count()
+
+    def copy(self) -> "CallbackBitmap":
+        bitmap = CallbackBitmap()
+        bitmap.bits, bitmap.count = self.bits, self.count
+        return bitmap
+
 class PendingDepositBatch:
     """
     Batch in allocation.
@@ -141,13 +566,19 @@ class PendingDepositBatch:
     :id: batch id
     :nav_growth: increments after callbacks from container received.
     :notion_token_remainder: amount of notion tokens returned from container if enter failed
+    :callbacks: containers processed in batch
+    :idle_containers: bits of containers which got no notion in batch, they have nothing to confirm
     """
     id: int = 0
     notion_token_remainder: int = 0
     batch_nav: int = 0
     nav_after_harvest: int = 0
     nav_after_harvest_and_enter: int = 0
-    processed_containers: list = []
+    callbacks: CallbackBitmap
+    idle_containers: int = 0
+
+    def __init__(self):
+        self.callbacks = CallbackBitmap()
 
 class WithdrawalBatch:
     """
@@ -167,11 +598,86 @@ class PendingWithdrawalBatch:
     :batch_shares_amount: batch shares amount
     :total_supply_snapshot: total supply at the moment of withdrawal processing
     :notion_token_remainder: amount of notion tokens received from containers after withdrawals
+    :callbacks: containers processed in batch
     """
     id_: int
     batch_shares_amount: int
     total_supply_snapshot: int
     notion_token_remainder: int
+    callbacks: CallbackBitmap
+
+    def __init__(self):
+        self.callbacks = CallbackBitmap()
+
+
+# Queues
+class RingBuffer:
+    """
+    Bounded FIFO queue over preallocated list.
+    push/pop are O(1), queue never grows beyond capacity: push into full buffer raises MessageQueueFull,
+    push_overwrite drops oldest item instead.
+    """
+    capacity: int
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity
+        self._items: list = [None] * capacity
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def is_full(self) -> bool:
+        return self._size == self.capacity
+
+    def push(self, item) -> None:
+        if self._size == self.capacity:
+            raise MessageQueueFull()
+        self._items[(self._head + self._size) % self.capacity] = item
+        self._size += 1
+
+    def push_overwrite(self, item):
+        """:return: oldest item dropped to make room, None if buffer was not full"""
+        if self._size < self.capacity:
+            self.push(item)
+            return None
+        dropped = self._items[self._head]
+        self._items[self._head] = item
+        self._head = (self._head + 1) % self.capacity
+        return dropped
+
+    def peek(self):
+        if self._size == 0:
+            return None
+        return self._items[self._head]
+
+    def pop(self):
+        if self._size == 0:
+            return None
+        item = self._items[self._head]
+        self._items[self._head] = None
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+        return item
+
+    def drain(self, max_items: int | None = None) -> list:
+        """Pop up to max_items (all by default) in FIFO order with slice copies instead of per-item pops"""
+        count = self._size if max_items is None else min(max_items, self._size)
+        head, stop = self._head, self._head + count
+        if stop <= self.capacity:
+            items = self._items[head:stop]
+            self._items[head:stop] = [None] * count
+        else:
+            stop -= self.capacity
+            items = self._items[head:] + self._items[:stop]
+            self._items[head:] = [None] * (self.capacity - head)
+            self._items[:stop] = [None] * stop
+        self._head = stop % self.capacity
+        self._size -= count
+        return items
 
 
 # Technical
@@ -0,0 +1,156 @@
+"""
+Planner from target weights to enter_logic calls.
+
+Given agent balances, capital weight of every logic and token ratio every logic requires,
+planner prices all tokens once through SwapRouter quotes (cache first), splits container value
+between logics, nets required amounts against balances per token and matches surpluses
+with deficits into direct swaps. Result is prepare_liquidity swaps plus one EnterInstruction
+per logic, amounts never exceed balance guaranteed by min_amount_out of swaps.
+"""
+from containers import Logic
+from datastructures import ERC20, EnterInstruction, SwapInstruction
+from swap_router import SwapRouter
+
+
+class LogicTarget:
+    """
+    :weight: share of container value for logic, relative to weights of other targets
+    :tokens: tokens logic is entered with
+    :ratios: value ratio of tokens, aligned with tokens
+    """
+    logic: Logic
+    weight: int
+    tokens: list[ERC20]
+    ratios: list[int]
+
+    def __init__(self, logic: Logic, weight: int, tokens: list[ERC20], ratios: list[int]):
+        if len(tokens) != len(ratios):
+            raise ValueError("tokens and ratios must have same length")
+        if sum(ratios) == 0:
+            raise ValueError("ratios sum is zero")
+        self.logic = logic
+        self.weight = weight
+        self.tokens = tokens
+        self.ratios = ratios
+
+
+class EnterPlan:
+    """
+    :swaps: swaps for prepare_liquidity
+    :enters: enter_logic arguments, aligned with targets
+    :total_value: container value in value token
+    """
+    swaps: list[SwapInstruction]
+    enters: list[EnterInstruction]
+    total_value: int
+
+    def __init__(self, swaps: list[SwapInstruction], enters: list[EnterInstruction], total_value: int):
+        self.swaps = swaps
+        self.enters = enters
+        self.total_value = total_value
+
+
+class EnterPlanner:
+    """
+    :value_token: token all values are measured in, usually container notion
+    :slippage_bps: tolerance applied to swap min_amount_out and to min_liquidity_delta
+    :reference_amount: amount of value token quoted to price every other token
+    """
+    def __init__(self, swap_router: SwapRouter, value_token: ERC20, slippage_bps: int = 50, reference_amount: int = 10 ** 6):
+        self.swap_router = swap_router
+        self.value_token = value_token
+        self.slippage_bps = slippage_bps
+        self.reference_amount = reference_amount
+
+    def prices(self, tokens: list[ERC20]) -> list[int]:
+        """Amount of every token received for reference_amount of value token"""
+        prices = []
+        for token in tokens:
+            if token.address == self.value_token.address:
+                prices.append(self.reference_amount)
+                continue
+            quotes = self.swap_router.quoteAll(SwapInstruction(
+                amount_in=self.reference_amount,
+                min_amount_out=0,
+                token_in=self.value_token.address,
+                token_out=token.address,
+                payload=bytes(),
+            ))
+            if not quotes or max(quotes.values()) == 0:
+                raise ValueError(f"No quote for token {token.address}")
+            prices.append(max(quotes.values()))
+        return prices
+
+    def plan(self, balances: dict[ERC20, int], targets: list[LogicTarget]) -> EnterPlan:
+        tokens = list(balances)
+        index = {token: i for i, token in enumerate(tokens)}
+        for target in targets:
+            for token in target.tokens:
+                if token not in index:
+                    index[token] = len(tokens)
+                    tokens.append(token)
+        n = len(tokens)
+        reference = self.reference_amount
+        keep = 10_000 - self.slippage_bps
+        prices = self.prices(tokens)
+        held = [balances.get(token, 0) for token in tokens]
+        total_value = sum(amount * reference // price for amount, price in zip(held, prices))
+
+        # value of every logic, then amount of every token it needs
+        total_weight = sum(target.weight for target in targets) or 1
+        wanted: list[list[int]] = []
+        needed = [0] * n
+        for target in targets:
+            logic_value = total_value * target.weight // total_weight
+            ratio_sum = sum(target.ratios)
+            row = [logic_value * ratio // ratio_sum * prices[index[token]] // reference for token, ratio in zip(target.tokens, target.ratios)]
+            for token, amount in zip(target.tokens, row):
+                needed[index[token]] += amount
+            wanted.append(row)
+
+        # match surplus value with deficit value, largest first
+        surplus = sorted(([(held[i] - needed[i]) * reference // prices[i], i] for i in range(n) if held[i] > needed[i]), reverse=True)
+        deficit = sorted(([(needed[i] - held[i]) * reference // prices[i], i] for i in range(n) if needed[i] > held[i]), reverse=True)
+        available = held[:]
+        swaps = []
+        s = d = 0
+        while s < len(surplus) and d < len(deficit):
+            value = min(surplus[s][0], deficit[d][0])
+            i, j = surplus[s][1], deficit[d][1]
+            amount_in = value * prices[i] // reference
+            min_amount_out = value * prices[j] // reference * keep // 10_000
+            if amount_in > 0:
+                swaps.append(SwapInstruction(
+                    amount_in=amount_in,
+                    min_amount_out=min_amount_out,
+                    token_in=tokens[i].address,
+                    token_out=tokens[j].address,
+                    payload=bytes(),
+                ))
+                available[i] -= amount_in
+                available[j] += min_amount_out
+            surplus[s][0] -= value
+            deficit[d][0] -= value
+            if surplus[s][0] == 0:
+                s += 1
+            if deficit[d][0] == 0:
+                d += 1
+
+        # scale tokens short after slippage so enters spend only guaranteed balance
+        enters = []
+        for target, row in zip(targets, wanted):
+            amounts = []
+            value = 0
+            for token, amount in zip(target.tokens, row):
+                i = index[token]
+                if needed[i] > available[i]:
+                    amount = amount * available[i] // needed[i]
+                amounts.append(amount)
+                value += amount * reference // prices[i]
+            enters.append(EnterInstruction(
+                logic=target.logic,
+                tokens=target.tokens,
+                amounts=amounts,
+                min_liquidity_delta=value * keep // 10_000,
+            ))
+        return EnterPlan(swaps, enters, total_value)
@@ -8,4 +8,9 @@ class NotEnoughShares(Exception):
     ...
 
 class FinalizeWithdrawalError(Exception):
-    ...
\ No newline at end of file
+    ...
+class MessageCodecError(Exception):
+    ...
+
+class MessageQueueFull(Exception):
+    ...
@@ -0,0 +1,208 @@
+"""
+Precompiled fixed-layout codecs for cross-chain messages.
+
+Every message in datastructures has static ABI layout, so encoding is a concatenation
+of 32-byte words and decoding is memoryview slicing at known offsets.
+Output is byte-identical to eth_abi.encode/decode with the same type list;
+eth_abi stays as reference implementation and can be switched on as verification mode,
+which cross-checks every encode/decode call.
+"""
+from struct import Struct, error as StructError
+
+from eth_abi import decode as abi_decode
+from eth_abi import encode as abi_encode
+
+from errors import MessageCodecError
+
+WORD = 32
+_ZERO_WORD = bytes(WORD)
+_ADDRESS_PADDING = bytes(12)
+_UINT8_WORD = Struct(">31xB")  # uint8 right-aligned in 32-byte word
+_LENGTH_WORD = Struct(">24xQ")  # dynamic bytes length, always < 2**64
+_BYTES_OFFSET_WORD = _LENGTH_WORD.pack(2 * WORD)  # tuple (uint8, bytes): tail starts after two head words
+
+verify: bool = False
+
+
+def set_verification(enabled: bool) -> None:
+    """Cross-check every encode/decode against eth_abi (slow, for testing)"""
+    global verify
+    verify = enabled
+
+
+class MessageCodec:
+    """
+    Codec for one fixed ABI type list.
+
+    :abi_types: eth_abi type strings of the layout, used in verification mode
+    """
+    abi_types: tuple[str, ...] = ()
+
+    def encode(self, *values) -> bytes:
+        try:
+            raw = self._encode(*values)
+        except (OverflowError, ValueError, TypeError, StructError) as e:
+            raise MessageCodecError(f"Can not encode {self.abi_types}: {e}") from e
+        if verify:
+            expected = abi_encode(list(self.abi_types), list(values))
+            if raw != expected:
+                raise MessageCodecError(f"Encoding of {self.abi_types} differs from eth_abi")
+        return raw
+
+    def decode(self, raw: bytes) -> tuple:
+        decoded = self._decode(memoryview(raw))
+        if decoded is None:
+            # not canonical layout: leave it to generic decoder
+            decoded = abi_decode(list(self.abi_types), bytes(raw))
+        elif verify:
+            expected = abi_decode(list(self.abi_types), bytes(raw))
+            if decoded != expected:
+                raise MessageCodecError(f"Decoding of {self.abi_types} differs from eth_abi")
+        return decoded
+
+    def _encode(self, *values) -> bytes:
+        raise NotImplementedError()
+
+    def _decode(self, raw: memoryview) -> tuple | None:
+        raise NotImplementedError()
+
+
+class Uint256PairCodec(MessageCodec):
+    abi_types = ("uint256", "uint256")
+
+    def _encode(self, a: int, b: int) -> bytes:
+        return a.to_bytes(WORD, "big") + b.to_bytes(WORD, "big")
+
+    def _decode(self, raw: memoryview) -> tuple | None:
+        if len(raw) < 2 * WORD:
+            raise MessageCodecError("Expected 64 bytes for (uint256,uint256)")
+        return int.from_bytes(raw[:WORD], "big"), int.from_bytes(raw[WORD:2 * WORD], "big")
+
+
+class Uint256TripleCodec(MessageCodec):
+    abi_types = ("uint256", "uint256", "uint256")
+
+    def _encode(self, a: int, b: int, c: int) -> bytes:
+        return a.to_bytes(WORD, "big") + b.to_bytes(WORD, "big") + c.to_bytes(WORD, "big")
+
+    def _decode(self, raw: memoryview) -> tuple | None:
+        if len(raw) < 3 * WORD:
+            raise MessageCodecError("Expected 96 bytes for (uint256,uint256,uint256)")
+        return (
+            int.from_bytes(raw[:WORD], "big"),
+            int.from_bytes(raw[WORD:2 * WORD], "big"),
+            int.from_bytes(raw[2 * WORD:3 * WORD], "big"),
+        )
+
+
+class AddressCodec(MessageCodec):
+    abi_types = ("address",)
+
+    def _encode(self, address: str | bytes) -> bytes:
+        if isinstance(address, str):
+            if len(address) != 42 or address[:2] not in ("0x", "0X"):
+                raise ValueError(f"Invalid address {address!r}")
+            address = bytes.fromhex(address[2:])
+        elif len(address) != 20:
+            raise ValueError("Address must be 20 bytes")
+        return _ADDRESS_PADDING + address
+
+    def _decode(self, raw: memoryview) -> tuple | None:
+        if len(raw) < WORD:
+            raise MessageCodecError("Expected 32 bytes for address")
+        if raw[:12] != _ADDRESS_PADDING:
+            return None
+        return ("0x" + raw[12:WORD].hex(),)
+
+
+class Uint8BytesCodec(MessageCodec):
+    """
+    (uint8, bytes) layout:
+    word 0 - uint8, word 1 - offset of bytes (always 64), word 2 - length, then data padded to 32 bytes
+    """
+    abi_types = ("uint8", "bytes")
+
+    def _encode(self, value: int, data: bytes) -> bytes:
+        length = len(data)
+        return b"".join((
+            _UINT8_WORD.pack(value),
+            _BYTES_OFFSET_WORD,
+            _LENGTH_WORD.pack(length),
+            data,
+            _ZERO_WORD[:-length % WORD],
+        ))
+
+    def _decode(self, raw: memoryview) -> tuple | None:
+        value, payload = self.decode_view(raw)
+        if payload is None:
+            return None
+        return value, bytes(payload)
+
+    def decode_view(self, raw: memoryview) -> tuple[int, memoryview | None]:
+        """Zero-copy decode: payload is memoryview into raw, None if layout is not canonical"""
+        if len(raw) < 3 * WORD:
+            raise MessageCodecError("Expected at least 96 bytes for (uint8,bytes)")
+        if raw[WORD:2 * WORD] != _BYTES_OFFSET_WORD or raw[:WORD - 1] != _ZERO_WORD[:WORD - 1]:
+            return 0, None
+        length = int.from_bytes(raw[2 * WORD:3 * WORD], "big")
+        if 3 * WORD + length > len(raw):
+            raise MessageCodecError("Bytes length exceeds message size")
+        return raw[WORD - 1], raw[3 * WORD:3 * WORD + length]
+
+
+UINT256_PAIR = Uint256PairCodec()
+UINT256_TRIPLE = Uint256TripleCodec()
+ADDRESS = AddressCodec()
+UINT8_BYTES = Uint8BytesCodec()
+
+
+class EnvelopeCodec:
+    """
+    Envelope packing many container messages into one delivery.
+
+    Layout: magic (uint8) | count (uint32) | records,
+    record: message type (uint8) | payload length (uint32) | payload.
+    Magic byte is never zero, while ABI encoded ContainerMessage always starts with zero byte,
+    so both can arrive through the same receive path.
+    """
+    MAGIC = 0xEB
+    HEADER = Struct(">BI")
+    RECORD_HEADER = Struct(">BI")
+
+    def encode(self, records: list[tuple[int, bytes]]) -> bytes:
+        pack_record = self.RECORD_HEADER.pack
+        parts = [self.HEADER.pack(self.MAGIC, len(records))]
+        for type_, payload in records:
+            parts.append(pack_record(type_, len(payload)))
+            parts.append(payload)
+        return b"".join(parts)
+
+    def is_envelope(self, raw: bytes) -> bool:
+        return len(raw) >= self.HEADER.size and raw[0] == self.MAGIC
+
+    def count(self, raw: bytes) -> int:
+        return self.HEADER.unpack_from(raw)[1]
+
+    def iter_records(self, raw: memoryview):
+        """Yield (type, payload view) without copying, decoding each record only when reached"""
+        magic, count = self.HEADER.unpack_from(raw)
+        if magic != self.MAGIC:
+            raise MessageCodecError("Not a message envelope")
+        unpack_record = self.RECORD_HEADER.unpack_from
+        record_header_size = self.RECORD_HEADER.size
+        offset = self.HEADER.size
+        for _ in range(count):
+            if offset + record_header_size > len(raw):
+                raise MessageCodecError("Envelope truncated")
+            type_, length = unpack_record(raw, offset)
+            offset += record_header_size
+            if offset + length > len(raw):
+                raise MessageCodecError("Envelope truncated")
+            yield type_, raw[offset:offset + length]
+            offset += length
+
+    def record_size(self, payload: bytes) -> int:
+        return self.RECORD_HEADER.size + len(payload)
+
+
+ENVELOPE = EnvelopeCodec()
@@ -1,15 +1,156 @@
-from datastructures import Message
+from datastructures import ContainerMessage, Message, MessageEnvelope, RingBuffer
+from errors import MessageQueueFull
+from message_codecs import ENVELOPE
 
 
 class Messaging:
+    """
+    Sequenced messaging endpoint.
+    Every sent message gets monotonically increasing sequence number and is queued in bounded outbox
+    until relayer drains it; until first drain nobody consumes outbox and full outbox drops oldest message,
+    after it full outbox raises MessageQueueFull.
+    Delivered messages are queued in bounded inbox, replayed sequence numbers are dropped,
+    sequence numbers more than inbox_capacity ahead of first undelivered one are rejected.
+    Queues are preallocated ring buffers created on first use.
+    """
     last_message: Message
 
-    def send_message(self, message: Message) -> None:
+    outbox_capacity: int = 1024
+    inbox_capacity: int = 1024
+
+    _outbox: RingBuffer | None = None
+    _outbox_drained: bool = False # relayer attached
+    messages_overwritten: int = 0
+    _inbox: RingBuffer | None = None
+    _next_sequence: int = 0
+    # all sequence numbers below watermark are delivered, delivered numbers above it are kept in set
+    _inbox_watermark: int = 0
+    _inbox_ahead: set | None = None
+    duplicates_dropped: int = 0
+
+    @property
+    def outbox(self) -> RingBuffer:
+        if self._outbox is None:
+            self._outbox = RingBuffer(self.outbox_capacity)
+        return self._outbox
+
+    @property
+    def inbox(self) -> RingBuffer:
+        if self._inbox is None:
+            self._inbox = RingBuffer(self.inbox_capacity)
+            self._inbox_ahead = set()
+        return self._inbox
+
+    def send_message(self, message: Message) -> int:
+        """
+        Queue message for relaying
+        :return: message sequence number
+        """
+        sequence = self._next_sequence
+        if self._outbox_drained:
+            self.outbox.push((sequence, message))
+        elif self.outbox.push_overwrite((sequence, message)) is not None:
+            self.messages_overwritten += 1
+        self._next_sequence = sequence + 1
         self.last_message = message
+        return sequence
+
+    def drain_outbox(self, max_items: int | None = None) -> list[tuple[int, Message]]:
+        """Take queued (sequence, message) pairs for relaying, oldest first"""
+        self._outbox_drained = True
+        return self.outbox.drain(max_items)
+
+    def deliver(self, sequence: int, message: Message) -> bool:
+        """
+        Put relayed message into inbox.
+        :return: False if sequence number already delivered (replay), message dropped
+        """
+        inbox = self.inbox
+        if sequence < self._inbox_watermark or sequence in self._inbox_ahead:
+            self.duplicates_dropped += 1
+            return False
+        if sequence >= self._inbox_watermark + self.inbox_capacity:
+            raise MessageQueueFull("Sequence beyond inbox window")
+        inbox.push((sequence, message))
+        if sequence == self._inbox_watermark:
+            watermark = sequence + 1
+            while watermark in self._inbox_ahead:
+                self._inbox_ahead.remove(watermark)
+                watermark += 1
+            self._inbox_watermark = watermark
+        else:
+            self._inbox_ahead.add(sequence)
+        return True
+
+    def deliver_many(self, messages: list[tuple[int, Message]]) -> int:
+        """:return: number of accepted (not replayed) messages"""
+        return sum(self.deliver(sequence, message) for sequence, message in messages)
+
+    def next_message(self) -> tuple[int, Message] | None:
+        return self.inbox.pop()
+
+    def drain_inbox(self, max_items: int | None = None) -> list[tuple[int, Message]]:
+        return self.inbox.drain(max_items)
 
 class LayerZero(Messaging):
     def lzReceive(self, message: bytes):
-        self._receive_message(message)
+        """Delivery is either single ABI encoded ContainerMessage or MessageEnvelope"""
+        if ENVELOPE.is_envelope(message):
+            for container_message in MessageEnvelope.from_bytes(message):
+                self._receive_message(container_message)
+        else:
+            self._receive_message(ContainerMessage.from_bytes(message))
+
+    def _receive_message(self, message: ContainerMessage):
+        ...
+
+
+class BatchingSender:
+    """
+    Packs container messages into MessageEnvelope and sends it through messaging
+    when buffered count reaches max_messages or envelope size would exceed max_bytes.
+
+    :messaging: underlying messaging (container or LayerZero endpoint)
+    :max_messages: flush when buffer holds this many messages
+    :max_bytes: envelope size limit, message that does not fit flushes buffer first
+    """
+    messaging: Messaging
+    max_messages: int
+    max_bytes: int
+
+    envelopes_sent: int = 0
+    messages_sent: int = 0
+
+    def __init__(self, messaging: Messaging, max_messages: int = 64, max_bytes: int = 10_000):
+        if max_messages <= 0 or max_bytes <= ENVELOPE.HEADER.size:
+            raise ValueError("Flush limits too small")
+        self.messaging = messaging
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self._buffer: list[ContainerMessage] = []
+        self._buffered_bytes = ENVELOPE.HEADER.size
+
+    def send(self, message: ContainerMessage) -> None:
+        record_size = ENVELOPE.record_size(message.payload)
+        if ENVELOPE.HEADER.size + record_size > self.max_bytes:
+            raise ValueError("Message does not fit into envelope")
+        if self._buffered_bytes + record_size > self.max_bytes:
+            self.flush()
+        self._buffer.append(message)
+        self._buffered_bytes += record_size
+        if len(self._buffer) >= self.max_messages:
+            self.flush()
+
+    def flush(self) -> MessageEnvelope | None:
+        if not self._buffer:
+            return None
+        envelope = MessageEnvelope(self._buffer)
+        self._buffer = []
+        self._buffered_bytes = ENVELOPE.HEADER.size
+        self.messaging.send_message(envelope)
+        self.envelopes_sent += 1
+        self.messages_sent += len(envelope)
+        return envelope
 
-    def _receive_message(self, message: bytes):
-        ...
\ No newline at end of file
+    def __len__(self) -> int:
+        return len(self._buffer)
@@ -0,0 +1,219 @@
+"""
+Asyncio driver for the deposit flow from README.
+
+Every principal/agent pair runs its own pipeline:
+start_enter -> bridge arrivals -> claim_bridge -> prepare_liquidity -> enter_logic
+-> deposit confirmation -> receive_message -> finalize_enter.
+Pipelines run concurrently and vault batch is finished after all of them joined,
+so batch cycle time is bounded by the slowest container, not by the sum of all containers.
+Real chains are replaced by LatencyModel stand-ins.
+"""
+import asyncio
+import time
+
+from bridge_adapters import AcrossBridgeAdapter, BridgeAdapter, CCTPBridgeAdapter
+from containers import AgentContainer, PrincipalContainer
+from datastructures import (
+    BridgeInstruction,
+    BridgeMessage,
+    ContainerMessage,
+    EnterInstruction,
+    Message,
+    MessageType,
+    SuccessDepositConfirmation,
+    SwapInstruction,
+)
+from vault import Vault
+
+
+class LatencyModel:
+    """
+    Latency stand-in for chains, bridges and messaging, in seconds.
+    Default model has no latency.
+    """
+
+    def call(self, container: object, method: str) -> float:
+        """Transaction latency of container method call"""
+        return 0.0
+
+    def bridge(self, adapter: BridgeAdapter, instruction: BridgeInstruction) -> float:
+        """Time between bridge on source chain and arrival on remote adapter"""
+        return 0.0
+
+    def message(self, message: Message) -> float:
+        """Cross-chain message delivery time"""
+        return 0.0
+
+
+class ConstantLatency(LatencyModel):
+    def __init__(self, call: float = 0.0, bridge: float = 0.0, message: float = 0.0):
+        self._call = call
+        self._bridge = bridge
+        self._message = message
+
+    def call(self, container: object, method: str) -> float:
+        return self._call
+
+    def bridge(self, adapter: BridgeAdapter, instruction: BridgeInstruction) -> float:
+        return self._bridge
+
+    def message(self, message: Message) -> float:
+        return self._message
+
+
+class ContainerPlan:
+    """
+    Operator instructions for one principal/agent pair in deposit batch.
+
+    :bridge_adapters: principal side adapters, aligned with bridge_instructions
+    :remote_adapters: agent side adapter where each bridge instruction arrives
+    :remote_tokens: token received on remote chain for each bridge instruction
+    :agent_swaps: swaps for agent prepare_liquidity
+    :enters: enter_logic calls on agent
+    :finalize_adapters: adapters principal claims notion from in finalize_enter
+    :finalize_swaps: principal swaps into notion in finalize_enter
+    """
+    principal: PrincipalContainer
+    agent: AgentContainer
+    enter_swaps: list[SwapInstruction]
+    bridge_adapters: list[BridgeAdapter]
+    bridge_instructions: list[BridgeInstruction]
+    remote_adapters: list[BridgeAdapter]
+    remote_tokens: list[str]
+    agent_swaps: list[SwapInstruction]
+    enters: list[EnterInstruction]
+    finalize_adapters: list[BridgeAdapter]
+    finalize_swaps: list[SwapInstruction]
+
+    def __init__(
+        self,
+        principal: PrincipalContainer,
+        agent: AgentContainer,
+        bridge_adapters: list[BridgeAdapter],
+        bridge_instructions: list[BridgeInstruction],
+        remote_adapters: list[BridgeAdapter],
+        remote_tokens: list[str],
+        enters: list[EnterInstruction],
+        enter_swaps: list[SwapInstruction] | None = None,
+        agent_swaps: list[SwapInstruction] | None = None,
+        finalize_adapters: list[BridgeAdapter] | None = None,
+        finalize_swaps: list[SwapInstruction] | None = None,
+    ):
+        if not len(bridge_adapters) == len(bridge_instructions) == len(remote_adapters) == len(remote_tokens):
+            raise ValueError("bridge_adapters, bridge_instructions, remote_adapters and remote_tokens must have same length")
+        self.principal = principal
+        self.agent = agent
+        self.bridge_adapters = bridge_adapters
+        self.bridge_instructions = bridge_instructions
+        self.remote_adapters = remote_adapters
+        self.remote_tokens = remote_tokens
+        self.enters = enters
+        self.enter_swaps = enter_swaps or []
+        self.agent_swaps = agent_swaps or []
+        self.finalize_adapters = finalize_adapters or []
+        self.finalize_swaps = finalize_swaps or []
+
+
+def deliver_bridge(adapter: BridgeAdapter, container: str, token: str, amount: int) -> None:
+    """Bridge stand-in: call adapter receive entrypoint as bridge protocol would on remote chain"""
+    data = BridgeMessage(container=container).to_bytes()
+    if isinstance(adapter, AcrossBridgeAdapter):
+        adapter.handleV3AcrossMessage(token=token, amount=amount, recipient=container, data=data)
+    elif isinstance(adapter, CCTPBridgeAdapter):
+        adapter.cctpReceiveMessage(token=token, amount=amount, recipient=container, data=data)
+    else:
+        adapter._receiveBridge(container, token, amount)
+
+
+class DepositOrchestrator:
+    """
+    Runs deposit batch over all container plans concurrently.
+
+    :durations: seconds spent by each principal pipeline in last batch
+    :cycle_time: seconds spent by last batch end to end
+    """
+    vault: Vault
+    latency: LatencyModel
+
+    def __init__(self, vault: Vault, latency: LatencyModel | None = None):
+        self.vault = vault
+        self.latency = latency or LatencyModel()
+        self.durations: dict[PrincipalContainer, float] = dict()
+        self.cycle_time: float = 0.0
+
+    async def run_deposit_batch(self, plans: list[ContainerPlan]) -> None:
+        started = time.perf_counter()
+        await self._call(self.vault, "start_current_deposit_batch_processing")
+        self.vault.start_current_deposit_batch_processing()
+        await asyncio.gather(*(self._run_container(plan) for plan in plans))
+        await self._call(self.vault, "finish_deposit_batch_processing")
+        self.vault.finish_deposit_batch_processing()
+        self.cycle_time = time.perf_counter() - started
+
+    def run(self, plans: list[ContainerPlan]) -> None:
+        asyncio.run(self.run_deposit_batch(plans))
+
+    async def _run_container(self, plan: ContainerPlan) -> None:
+        started = time.perf_counter()
+        principal, agent = plan.principal, plan.agent
+
+        await self._call(principal, "start_enter")
+        principal.start_enter(plan.enter_swaps, plan.bridge_adapters, plan.bridge_instructions)
+        await asyncio.gather(*(
+            self._bridge(plan.bridge_adapters[i], instruction, plan.remote_adapters[i], plan.remote_tokens[i], principal.address)
+            for i, instruction in enumerate(plan.bridge_instructions)
+        ))
+
+        await asyncio.gather(*(
+            self._claim(agent, adapter, token) for adapter, token in zip(plan.remote_adapters, plan.remote_tokens)
+        ))
+        await self._call(agent, "prepare_liquidity")
+        agent.prepare_liquidity(plan.agent_swaps)
+        await asyncio.gather(*(self._enter(agent, enter) for enter in plan.enters))
+
+        await self._call(agent, "finalize_success_enters")
+        agent.finalize_success_enters()
+        await self._relay_confirmations(agent, principal)
+
+        await self._call(principal, "finalize_enter")
+        principal.finalize_enter(plan.finalize_adapters, plan.finalize_swaps)
+        self.durations[principal] = time.perf_counter() - started
+
+    async def _bridge(
+        self,
+        adapter: BridgeAdapter,
+        instruction: BridgeInstruction,
+        remote_adapter: BridgeAdapter,
+        remote_token: str,
+        container: str,
+    ) -> None:
+        await asyncio.sleep(self.latency.bridge(adapter, instruction))
+        deliver_bridge(remote_adapter, container, remote_token, instruction.amount)
+
+    async def _claim(self, agent: AgentContainer, adapter: BridgeAdapter, token: str) -> None:
+        await self._call(agent, "claim_bridge")
+        agent.claim_bridge(adapter, token)
+
+    async def _enter(self, agent: AgentContainer, enter: EnterInstruction) -> None:
+        await self._call(agent, "enter_logic")
+        agent.enter_logic(enter.logic, enter.tokens, enter.amounts, enter.min_liquidity_delta)
+
+    async def _relay_confirmations(self, agent: AgentContainer, principal: PrincipalContainer) -> None:
+        """Relay agent outbox to principal, waits for every receive_message"""
+        deliveries = []
+        for _, message in agent.drain_outbox():
+            if type(message) is SuccessDepositConfirmation:
+                deliveries.append(self._deliver_message(
+                    principal,
+                    ContainerMessage(type=MessageType.DEPOSIT_CONFIRMATION, data=message.to_bytes()),
+                ))
+        await asyncio.gather(*deliveries)
+
+    async def _deliver_message(self, principal: PrincipalContainer, message: ContainerMessage) -> None:
+        await asyncio.sleep(self.latency.message(message))
+        principal.receive_message(message.to_bytes())
+
+    async def _call(self, container: object, method: str) -> None:
+        delay = self.latency.call(container, method)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,138 @@
+"""
+Epoch (block) scoped read-through cache for Logic and ERC20 reads of containers.
+
+Opt-in: containers read through cache only when read_cache is set, default behaviour
+(Logic.nav is stateful in technical model) is unchanged. Every state changing call
+of container (enter, exit, transfer, swap, claim) invalidates values it can change,
+advance() / epoch() start new block and drop everything.
+"""
+from contextlib import contextmanager
+
+
+class ReadCache:
+    """
+    :block: current epoch number
+    :hits: reads served from cache
+    :misses: reads forwarded to logic or token
+    """
+    def __init__(self):
+        self.block = 0
+        self.hits = 0
+        self.misses = 0
+        self._logic_values: dict[tuple[str, object], int] = dict() # (kind, logic) => value
+        self._balances: dict[tuple[str, str], int] = dict() # (token address, owner) => balance
+
+    def nav(self, logic) -> int:
+        return self._read_logic("nav", logic, logic.nav)
+
+    def underlying_liquidity_amount(self, logic) -> int:
+        return self._read_logic("liquidity", logic, logic.underlying_liquidity_amount)
+
+    def balance_of(self, token, owner: str) -> int:
+        key = (token.address, owner)
+        value = self._balances.get(key)
+        if value is None:
+            self.misses += 1
+            value = self._balances[key] = token.balanceOf(owner)
+        else:
+            self.hits += 1
+        return value
+
+    def balances_of(self, tokens: list, owner: str, reader) -> list[int]:
+        """Cached balances, misses are read through reader in one request"""
+        values = [self._balances.get((token.address, owner)) for token in tokens]
+        missing = [token for token, value in zip(tokens, values) if value is None]
+        self.hits += len(tokens) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            for token, value in zip(missing, reader.read(missing, owner)):
+                self._balances[(token.address, owner)] = value
+            values = [self._balances[(token.address, owner)] for token in tokens]
+        return values
+
+    def _read_logic(self, kind: str, logic, read) -> int:
+        key = (kind, logic)
+        value = self._logic_values.get(key)
+        if value is None:
+            self.misses += 1
+            value = self._logic_values[key] = read()
+        else:
+            self.hits += 1
+        return value
+
+    def invalidate_logic(self, logic) -> None:
+        """Logic enter/exit/harvest: its nav and liquidity change, tokens move between logic and container"""
+        self._logic_values.pop(("nav", logic), None)
+        self._logic_values.pop(("liquidity", logic), None)
+        self._balances.clear()
+
+    def invalidate_token(self, token_address: str) -> None:
+        """Transfer or claim of token"""
+        for key in [key for key in self._balances if key[0] == token_address]:
+            del self._balances[key]
+
+    def invalidate_tokens(self, token_addresses: list[str]) -> None:
+        for token_address in token_addresses:
+            self.invalidate_token(token_address)
+
+    def advance(self) -> None:
+        """New block, all cached values are stale"""
+        self.block += 1
+        self._logic_values.clear()
+        self._balances.clear()
+
+    @contextmanager
+    def epoch(self):
+        """Scope of one operation: cache starts and ends empty"""
+        self.advance()
+        try:
+            yield self
+        finally:
+            self.advance()
+
+    def stats(self) -> dict:
+        reads = self.hits + self.misses
+        return {
+            "block": self.block,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / reads if reads else 0.0,
+            "cached": len(self._logic_values) + len(self._balances),
+        }
+
+
+class ReadCacheSupport:
+    """
+    Container reads going through read_cache when it is set
+
+    :balance_reader: balance_reader.BalanceReader for aggregated balance reads
+    """
+    read_cache: ReadCache | None = None
+    balance_reader = None
+
+    def _nav(self, logic) -> int:
+        return logic.nav() if self.read_cache is None else self.read_cache.nav(logic)
+
+    def _underlying_liquidity_amount(self, logic) -> int:
+        if self.read_cache is None:
+            return logic.underlying_liquidity_amount()
+        return self.read_cache.underlying_liquidity_amount(logic)
+
+    def _balance_of(self, token, owner: str = "address(this)") -> int:
+        return token.balanceOf(owner) if self.read_cache is None else self.read_cache.balance_of(token, owner)
+
+    def _balances_of(self, tokens: list, owner: str = "address(this)") -> list[int]:
+        """Balances of many tokens, one aggregated request when balance_reader is set"""
+        if self.balance_reader is None:
+            return [self._balance_of(token, owner) for token in tokens]
+        if self.read_cache is None:
+            return self.balance_reader.read(tokens, owner)
+        return self.read_cache.balances_of(tokens, owner, self.balance_reader)
+
+    def _logic_changed(self, logic) -> None:
+        if self.read_cache is not None:
+            self.read_cache.invalidate_logic(logic)
+
+    def _tokens_changed(self, token_addresses: list[str]) -> None:
+        if self.read_cache is not None:
+            self.read_cache.invalidate_tokens(token_addresses)
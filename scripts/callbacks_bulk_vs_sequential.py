@@ -0,0 +1,69 @@
+import random
+
+from containers import Container
+from datastructures import ERC20
+from swap_router import SwapRouter
+from vault import Vault
+
+# Bulk callbacks leave batch in same state (or fail with same error and no changes) as callbacks one by one
+
+notion = ERC20(address="0x01", name="USDC")
+
+
+def make_vault(size: int, amount: int) -> tuple[Vault, list[Container]]:
+    v = Vault(notion)
+    containers = [Container(swap_router=SwapRouter(), notion=notion) for _ in range(size)]
+    for i, container in enumerate(containers):
+        v.add_container(container, 0 if i == 0 and size > 1 else v.PRECISION // size) # first container idle
+    v.create_deposit_request(amount)
+    v.start_current_deposit_batch_processing()
+    return v, containers
+
+
+def batch_state(v: Vault) -> tuple:
+    batch = v.pending_deposit_batch
+    return (
+        batch.nav_after_harvest,
+        batch.nav_after_harvest_and_enter,
+        batch.notion_token_remainder,
+        batch.callbacks.bits,
+        batch.callbacks.count,
+    )
+
+
+rng = random.Random(0)
+for _ in range(3000):
+    size, amount = rng.randint(1, 6), rng.choice([10_000, 3])
+    sequential, sequential_containers = make_vault(size, amount)
+    bulk, bulk_containers = make_vault(size, amount)
+    count = rng.randint(1, size + 1)
+    senders = [rng.randrange(size) for _ in range(count)] if rng.random() < 0.5 else None
+    rows = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            rows.append((0, 0, rng.randint(1, 9)))
+        else:
+            harvest = rng.randint(0, 9)
+            rows.append((harvest, harvest + rng.randint(0, 9), 0))
+
+    sequential_error = bulk_error = None
+    try:
+        for i, row in enumerate(rows):
+            sequential.deposit_container_callback(*row, container=None if senders is None else sequential_containers[senders[i]])
+    except Exception as e:
+        sequential_error = str(e)
+    before = batch_state(bulk)
+    try:
+        bulk.deposit_container_callbacks(
+            *map(list, zip(*rows)),
+            containers=None if senders is None else [bulk_containers[i] for i in senders],
+        )
+    except Exception as e:
+        bulk_error = str(e)
+
+    assert bulk_error == sequential_error, (rows, senders, sequential_error, bulk_error)
+    if sequential_error is None:
+        assert batch_state(bulk) == batch_state(sequential), (rows, senders)
+    else:
+        assert batch_state(bulk) == before, (rows, senders)
+print("callbacks bulk vs sequential ok")
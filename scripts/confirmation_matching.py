@@ -0,0 +1,50 @@
+from containers import PrincipalContainer
+from datastructures import ERC20, ContainerMessage, MessageType, SuccessDepositConfirmation
+from swap_router import SwapRouter
+from vault import Vault
+
+# Deposit confirmations are matched to batches by id, whatever order they arrive in
+
+usdc = ERC20(address="0x01", name="USDC")
+vault = Vault(usdc)
+principal = PrincipalContainer(vault=vault, swap_router=SwapRouter(), notion=usdc)
+vault.add_container(principal, vault.PRECISION)
+
+
+def confirm(nav_after_harvest: int, nav_after_harvest_and_enter: int, batch_id: int) -> None:
+    confirmation = SuccessDepositConfirmation(nav_after_harvest, nav_after_harvest_and_enter, batch_id=batch_id)
+    principal.receive_message(
+        ContainerMessage(type=MessageType.DEPOSIT_CONFIRMATION, data=confirmation.to_bytes()).to_bytes()
+    )
+
+
+batch_ids = []
+for amount in (100, 200):
+    vault.create_deposit_request(amount)
+    batch_ids.append(vault.deposit_batch.id_)
+    vault.start_current_deposit_batch_processing()
+    principal.start_enter(swaps=[], bridge_adapters=[], bridge_instructions=[], batch_id=batch_ids[-1])
+first, second = batch_ids
+
+# second batch confirmed first: oldest batch has neither confirmation nor remainder
+confirm(100, 300, second)
+try:
+    principal.finalize_enter([], [])
+    raise AssertionError("finalized batch without confirmation")
+except Exception as e:
+    assert str(e) == "No deposit confirmation or remainder for batch", e
+assert list(principal._enter_batch_ids) == [first, second]
+assert second in principal._deposit_confirmations
+
+principal.finalize_enter([], [], second)
+assert list(principal._enter_batch_ids) == [first]
+assert second not in principal._deposit_confirmations
+
+confirm(0, 100, first)
+principal.finalize_enter([], [])
+assert list(principal._enter_batch_ids) == []
+assert principal._deposit_confirmations == {}
+vault.finish_deposit_batch_processing(first)
+vault.finish_deposit_batch_processing(second)
+assert vault.nav == 300
+print("confirmation matching ok")
@@ -17,11 +17,13 @@ agent_ba1 = AcrossBridgeAdapter()
 principal_ba2 = CCTPBridgeAdapter()
 agent_ba2 = CCTPBridgeAdapter()
 
+vault = Vault(usdc)
 principal = PrincipalContainer(
-    vault=Vault(usdc),
+    vault=vault,
     swap_router=swap_router,
     notion=usdc,
 )
+vault.add_container(principal, vault.PRECISION)
 logic_1 = Logic()
 logic_2 = Logic()
 
@@ -29,6 +31,10 @@ agent = AgentContainer(swap_router=swap_router, notion=usdc_on_l2)
 agent.setLogic(logic_1, True)
 agent.setLogic(logic_2, True)
 
+vault.create_deposit_request(100)
+vault.start_current_deposit_batch_processing()
+batch_id = vault.pending_deposit_batch.id
+
 principal.start_enter(
     swaps=[
         SwapInstruction(
@@ -51,7 +57,8 @@ principal.start_enter(
             amount=50,
             payload=bytes()
         )
-    ]
+    ],
+    batch_id=batch_id,
 )
 
 # receive bridges on l2:
@@ -86,7 +93,7 @@ agent.enter_logic(
 
 
 # if success enters
-agent.finalize_success_enters()
+agent.finalize_success_enters(batch_id)
 print('Container NAV after harvest: ', agent.last_message.nav_after_harvest)
 print('Container NAV after harvest and enter: ', agent.last_message.nav_after_harvest_and_enter)
 
@@ -96,4 +103,4 @@ principal.receive_message(
         data=agent.last_message.to_bytes(),
     ).to_bytes()
 )
-principal.finalize_enter([], [])
\ No newline at end of file
+principal.finalize_enter([], [], batch_id)
\ No newline at end of file
@@ -0,0 +1,69 @@
+from containers import Container
+from datastructures import ERC20
+from swap_router import SwapRouter
+from vault import Vault
+
+# Every container confirms batch once, anonymous callbacks stop once all containers are marked
+
+notion = ERC20(address="0x01", name="USDC")
+
+
+def make_vault() -> tuple[Vault, list[Container]]:
+    v = Vault(notion)
+    containers = [Container(swap_router=SwapRouter(), notion=notion) for _ in range(3)]
+    for container in containers:
+        v.add_container(container, v.PRECISION // 3)
+    v.create_deposit_request(3000)
+    v.start_current_deposit_batch_processing()
+    return v, containers
+
+
+def assert_rejected(call, error: str) -> None:
+    try:
+        call()
+        raise AssertionError("duplicate callback accepted")
+    except Exception as e:
+        assert str(e) == error, e
+
+
+# same container twice
+v, containers = make_vault()
+v.deposit_container_callback(0, 1000, 0, container=containers[1])
+assert_rejected(lambda: v.deposit_container_callback(0, 1000, 0, container=containers[1]), "Container callback already received")
+assert v.missing_deposit_callbacks() == [containers[0], containers[2]]
+
+# unregistered sender
+stranger = Container(swap_router=SwapRouter(), notion=notion)
+assert_rejected(lambda: v.deposit_container_callback(0, 1000, 0, container=stranger), "Container is not registered")
+
+# anonymous callbacks fill missing bits, then are rejected
+v.deposit_container_callback(0, 1000, 0)
+v.deposit_container_callback(0, 1000, 0)
+assert v.missing_deposit_callbacks() == []
+assert_rejected(lambda: v.deposit_container_callback(0, 1000, 0), "All containers already processed")
+assert_rejected(lambda: v.deposit_container_callback(0, 1000, 0, container=containers[0]), "Container callback already received")
+assert v.pending_deposit_batch.nav_after_harvest_and_enter == 3000
+
+# bulk delivery with duplicate is rejected as a whole
+v, containers = make_vault()
+assert_rejected(
+    lambda: v.deposit_container_callbacks([0, 0], [1000, 1000], [0, 0], containers=[containers[2], containers[2]]),
+    "Container callback already received",
+)
+assert_rejected(lambda: v.deposit_container_callbacks([0] * 4, [1000] * 4, [0] * 4), "All containers already processed")
+assert v.missing_deposit_callbacks() == containers
+assert v.pending_deposit_batch.nav_after_harvest_and_enter == 0
+
+# withdrawal callbacks
+v.deposit_container_callbacks([0] * 3, [1000] * 3, [0] * 3)
+v.finish_deposit_batch_processing()
+v.settle_deposit_batch(0)
+v.create_withdrawal_request(0, 300)
+v.start_current_withdrawal_batch_processing()
+v.withdrawal_container_callback(100, container=containers[0])
+assert_rejected(lambda: v.withdrawal_container_callback(100, container=containers[0]), "Container callback already received")
+assert_rejected(lambda: v.withdrawal_container_callbacks([100] * 3), "All containers already processed")
+v.withdrawal_container_callbacks([100] * 2)
+assert_rejected(lambda: v.withdrawal_container_callback(100), "All containers already processed")
+assert v.withdrawalBatchNAVs[0] == 300
+print("duplicate callbacks ok")
@@ -0,0 +1,45 @@
+from datastructures import Message
+from errors import MessageQueueFull
+from messaging import Messaging
+
+# Outbox without relayer keeps newest messages, inbox look-ahead window is bounded
+
+
+class Endpoint(Messaging):
+    outbox_capacity = 4
+    inbox_capacity = 4
+
+
+sender = Endpoint()
+messages = [Message() for _ in range(10)]
+for message in messages:
+    sender.send_message(message)
+assert sender.messages_overwritten == 6
+assert sender.last_message is messages[-1]
+assert sender.drain_outbox() == [(i, messages[i]) for i in range(6, 10)]
+
+# relayer attached: full outbox is back pressure, nothing is lost
+for message in messages[:4]:
+    sender.send_message(message)
+try:
+    sender.send_message(messages[4])
+    raise AssertionError("full outbox accepted message with relayer attached")
+except MessageQueueFull:
+    pass
+assert [sequence for sequence, _ in sender.drain_outbox()] == [10, 11, 12, 13]
+
+receiver = Endpoint()
+assert receiver.deliver(3, messages[3])
+try:
+    receiver.deliver(4, messages[4])
+    raise AssertionError("sequence beyond inbox window accepted")
+except MessageQueueFull:
+    pass
+assert receiver._inbox_ahead == {3}
+assert receiver.deliver(0, messages[0])
+assert not receiver.deliver(3, messages[3])
+assert receiver.deliver(1, messages[1]) and receiver.deliver(2, messages[2])
+assert receiver._inbox_watermark == 4 and receiver._inbox_ahead == set()
+assert [sequence for sequence, _ in receiver.drain_inbox()] == [3, 0, 1, 2]
+assert receiver.deliver(4, messages[4])
+print("messaging queues ok")
@@ -0,0 +1,42 @@
+from datastructures import PositionTable
+
+# Position views write through to table columns, indexes can not be bypassed
+
+table = PositionTable()
+for batch_id, owner in ((0, "alice"), (0, "bob"), (1, "alice")):
+    table.append(owner, 100, batch_id)
+
+view = table[0]
+view.shares_amount += 5
+view.notion_amount = 2 ** 70 # promotes column to python ints
+assert (table.shares_amount[0], table.notion_amount[0]) == (5, 2 ** 70)
+assert table.to_position(0).notion_amount == 2 ** 70
+
+try:
+    view.deposit_batch_id = 1
+    raise AssertionError("deposit batch of view changed")
+except AttributeError:
+    pass
+
+position = table.to_position(1)
+position.locked_shares_amount = 7
+table[1] = position
+assert table[1].locked_shares_amount == 7
+
+position.deposit_batch_id = 1
+try:
+    table[1] = position
+    raise AssertionError("deposit batch of row changed")
+except ValueError:
+    pass
+try:
+    table[len(table)] = position
+    raise AssertionError("row appended without owner")
+except KeyError:
+    pass
+
+assert table.deposit_batch_range(0) == range(0, 2)
+assert table.deposit_batch_range(1) == range(2, 3)
+assert table.owner_positions("alice") == [0, 2]
+assert len(table) == 3
+print("position table ok")
@@ -0,0 +1,45 @@
+from batch_scheduler import BatchClosePolicy, BatchScheduler
+from containers import Container
+from datastructures import ERC20
+from simulation import VirtualClock
+from swap_router import SwapRouter
+from vault import Vault
+
+# Claim against in-flight withdrawal batch is rejected and does not make scheduler close next batch over it
+
+notion = ERC20(address="0x01", name="USDC")
+v = Vault(notion)
+v.add_container(Container(swap_router=SwapRouter(), notion=notion), v.PRECISION)
+
+v.create_deposit_request(1000)
+v.create_deposit_request(1000)
+v.start_current_deposit_batch_processing()
+v.deposit_container_callback(nav_after_harvest=0, nav_after_harvest_and_enter=2000, notion_token_remainder=0)
+v.finish_deposit_batch_processing()
+v.settle_deposit_batch(0)
+
+scheduler = BatchScheduler(v, BatchClosePolicy(min_amount=1), VirtualClock())
+v.create_withdrawal_request(0, 300)
+assert [d.kind for d in scheduler.check()] == ["withdrawal"]
+assert v.pending_withdrawal_batch.id_ == 0
+
+try:
+    v.claim_withdrawn_notion_token(0, 0)
+    raise AssertionError("claim against in-flight batch accepted")
+except Exception as e:
+    assert str(e) == "Batch has not been processed", e
+assert 0 not in v.withdrawalBatchShares
+assert 0 not in v.withdrawalBatchNAVs
+
+v.create_withdrawal_request(1, 200)
+assert scheduler.check() == []
+assert scheduler.metrics.deferred == 1
+assert v.pending_withdrawal_batch.id_ == 0
+
+v.withdrawal_container_callback(notion_growth=300)
+v.finish_withdrawal_batch_processing()
+assert [d.kind for d in scheduler.check()] == ["withdrawal"]
+assert v.pending_withdrawal_batch.id_ == 1
+
+assert v.claim_withdrawn_notion_token(0, 0) == 300
+print("scheduler withdrawal in flight ok")
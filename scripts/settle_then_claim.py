@@ -0,0 +1,34 @@
+from containers import Container
+from datastructures import ERC20
+from swap_router import SwapRouter
+from vault import Vault
+
+# Claim after batch settlement does not touch settled shares, settlement after claim skips claimed positions
+
+notion = ERC20(address="0x01", name="USDC")
+v = Vault(notion)
+v.add_container(Container(swap_router=SwapRouter(), notion=notion), v.PRECISION)
+
+for amount in (100, 300, 600):
+    v.create_deposit_request(amount)
+v.start_current_deposit_batch_processing()
+v.deposit_container_callback(nav_after_harvest=0, nav_after_harvest_and_enter=1000, notion_token_remainder=0)
+v.finish_deposit_batch_processing()
+
+v.claim_shares_after_deposit(0)
+assert (v.positions[0].shares_amount, v.positions[0].notion_amount) == (100, 0)
+assert v.settle_deposit_batch(0) == 900
+assert [v.positions[i].shares_amount for i in range(3)] == [100, 300, 600]
+
+for position_id in range(3):
+    try:
+        v.claim_shares_after_deposit(position_id)
+        raise AssertionError("second claim accepted")
+    except Exception as e:
+        assert str(e) == "Shares already claimed", e
+assert [v.positions[i].shares_amount for i in range(3)] == [100, 300, 600]
+assert [v.positions[i].notion_amount for i in range(3)] == [0, 0, 0]
+
+assert v.settle_deposit_batch(0) == 0
+assert [v.positions[i].shares_amount for i in range(3)] == [100, 300, 600]
+print("settle then claim ok")
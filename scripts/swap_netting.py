@@ -0,0 +1,56 @@
+import random
+
+from datastructures import SwapInstruction
+from swap_router import net_swaps
+
+# Netting of swaps never guarantees less of any token than original swaps
+
+
+def swap(token_in: str, token_out: str, amount_in: int, min_amount_out: int) -> SwapInstruction:
+    return SwapInstruction(amount_in=amount_in, min_amount_out=min_amount_out, token_in=token_in, token_out=token_out, payload=bytes())
+
+
+def guaranteed_deltas(swaps: list[SwapInstruction]) -> dict[str, int]:
+    deltas = dict()
+    for s in swaps:
+        deltas[s.token_in] = deltas.get(s.token_in, 0) - s.amount_in
+        deltas[s.token_out] = deltas.get(s.token_out, 0) + s.min_amount_out
+    return deltas
+
+
+def assert_not_worse(swaps: list[SwapInstruction]) -> list[SwapInstruction]:
+    reduced = net_swaps(swaps).swaps
+    before, after = guaranteed_deltas(swaps), guaranteed_deltas(reduced)
+    for token in set(before) | set(after):
+        assert after.get(token, 0) >= before.get(token, 0), (token, before, after)
+    return reduced
+
+
+# backward swap asks more A than forward residual would leave: kept un-netted
+reduced = assert_not_worse([swap("A", "B", 100, 100), swap("B", "A", 50, 60)])
+assert [(s.token_in, s.amount_in, s.min_amount_out) for s in reduced] == [("A", 100, 100), ("B", 50, 60)]
+
+# round trip with profit on both legs: no residual guarantees both deltas, kept un-netted
+reduced = assert_not_worse([swap("A", "B", 100, 120), swap("B", "A", 100, 120)])
+assert len(reduced) == 2
+
+# residual A->B keeps deltas of both tokens
+reduced = assert_not_worse([swap("A", "B", 100, 200), swap("B", "A", 50, 20)])
+assert [(s.token_in, s.amount_in, s.min_amount_out) for s in reduced] == [("A", 80, 150)]
+
+# opposing swaps fully covering each other are dropped
+reduced = assert_not_worse([swap("A", "B", 100, 90), swap("B", "A", 95, 90)])
+assert reduced == []
+
+# merged swap runs after swap producing its token_in
+reduced = assert_not_worse([swap("B", "C", 100, 90), swap("A", "B", 100, 95), swap("B", "C", 95, 90)])
+assert [(s.token_in, s.token_out, s.amount_in) for s in reduced] == [("A", "B", 100), ("B", "C", 195)]
+
+rng = random.Random(0)
+for _ in range(20_000):
+    swaps = [
+        swap(*rng.sample("ABC", 2), rng.randint(1, 200), rng.randint(0, 200))
+        for _ in range(rng.randint(1, 6))
+    ]
+    assert_not_worse(swaps)
+print("swap netting ok")
@@ -0,0 +1,45 @@
+from containers import Container
+from datastructures import ERC20
+from swap_router import SwapRouter
+from vault import Vault
+
+# Fully netted withdrawal batch is finished on start, second finish is rejected
+
+notion = ERC20(address="0x01", name="USDC")
+c1 = Container(swap_router=SwapRouter(), notion=notion)
+v = Vault(notion)
+v.add_container(c1, v.PRECISION)
+
+v.create_deposit_request(1000)
+v.start_current_deposit_batch_processing()
+v.deposit_container_callback(nav_after_harvest=0, nav_after_harvest_and_enter=1000, notion_token_remainder=0)
+v.finish_deposit_batch_processing()
+v.settle_deposit_batch(0)
+assert (v.nav, v.total_shares) == (1000, 1000)
+
+v.create_withdrawal_request(0, 300)
+v.create_deposit_request(500)
+assert v.net_current_batches() == (300, 300)
+v.start_current_deposit_batch_processing()
+v.start_current_withdrawal_batch_processing()
+
+assert v.withdrawal_batch_finished(0)
+assert v.withdrawalBatchNAVs[0] == 300
+assert v.withdrawalBatchShares[0] == 300
+assert v.nav == 1000
+
+try:
+    v.finish_withdrawal_batch_processing()
+    raise AssertionError("second finish accepted")
+except Exception as e:
+    assert str(e) == "Withdrawal batch already finished", e
+try:
+    v.withdrawal_container_callback(notion_growth=10)
+    raise AssertionError("callback into finished batch accepted")
+except Exception as e:
+    assert str(e) == "Withdrawal batch already finished", e
+assert v.withdrawalBatchNAVs[0] == 300
+assert v.nav == 1000
+
+assert v.claim_withdrawn_notion_token(0, 0) == 300
+print("withdrawal finish ok")
@@ -0,0 +1,440 @@
+"""
+Discrete-event multi-chain simulation on virtual clock.
+
+Vault, PrincipalContainer/AgentContainer pairs, Across/CCTP bridge adapters and LayerZero endpoints
+are driven by events from heap-based VirtualClock; bridge, message and transaction latencies
+are sampled from configurable distributions. Nothing sleeps, so simulated hours run in seconds.
+
+Run from repository root:
+    PYTHONPATH=. python simulation.py --batches 100000
+"""
+import argparse
+import heapq
+import math
+import random
+import time
+
+from bridge_adapters import AcrossBridgeAdapter, BridgeAdapter, CCTPBridgeAdapter
+from bridge_router import BridgeModel, BridgeRoutePlanner
+from containers import AgentContainer, Logic, PrincipalContainer
+from datastructures import ERC20, BridgeInstruction, ContainerMessage, Message, MessageType, SuccessDepositConfirmation
+from messaging import LayerZero
+from orchestrator import LatencyModel, deliver_bridge
+from swap_router import SwapRouter
+from vault import Vault
+
+
+class VirtualClock:
+    """
+    Event queue ordered by virtual time.
+    Events scheduled for the same moment run in scheduling order.
+    """
+    now: float
+
+    def __init__(self):
+        self.now = 0.0
+        self._queue: list = []
+        self._sequence = 0
+        self.events_processed = 0
+
+    def schedule(self, delay: float, callback, *args) -> None:
+        if delay < 0:
+            raise ValueError("Can not schedule event in the past")
+        self._sequence += 1
+        heapq.heappush(self._queue, (self.now + delay, self._sequence, callback, args))
+
+    def schedule_at(self, moment: float, callback, *args) -> None:
+        self.schedule(moment - self.now, callback, *args)
+
+    def step(self) -> bool:
+        if not self._queue:
+            return False
+        self.now, _, callback, args = heapq.heappop(self._queue)
+        self.events_processed += 1
+        callback(*args)
+        return True
+
+    def run(self, until: float | None = None, stop=None) -> None:
+        """Process events until queue is empty, virtual time passes until or stop() returns True"""
+        queue = self._queue
+        pop = heapq.heappop
+        processed = 0
+        while queue:
+            if until is not None and queue[0][0] > until:
+                self.now = until
+                break
+            self.now, _, callback, args = pop(queue)
+            processed += 1
+            callback(*args)
+            if stop is not None and stop():
+                break
+        self.events_processed += processed
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+# Latency distributions
+class Distribution:
+    def sample(self, rng: random.Random) -> float:
+        raise NotImplementedError()
+
+class Constant(Distribution):
+    def __init__(self, value: float):
+        self.value = value
+
+    def sample(self, rng: random.Random) -> float:
+        return self.value
+
+class Uniform(Distribution):
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.uniform(self.low, self.high)
+
+class Exponential(Distribution):
+    def __init__(self, mean: float):
+        self.mean = mean
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.expovariate(1 / self.mean)
+
+class LogNormal(Distribution):
+    """Heavy right tail, typical for bridge fills. Parametrized by median and sigma of log"""
+    def __init__(self, median: float, sigma: float):
+        self.mu = math.log(median)
+        self.sigma = sigma
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(self.mu, self.sigma)
+
+
+class DistributionLatency(LatencyModel):
+    """
+    LatencyModel sampling from distributions, usable with DepositOrchestrator as well.
+
+    :bridge: latency distribution per bridge adapter class
+    :bridge_throughput: tokens per second filled by adapter class, leg latency grows by amount / throughput
+    """
+    def __init__(
+        self,
+        bridge: dict[type, Distribution],
+        message: Distribution,
+        call: Distribution = Constant(0.0),
+        rng: random.Random | None = None,
+        bridge_throughput: dict[type, float] | None = None,
+    ):
+        self.bridge_latency = bridge
+        self.message_latency = message
+        self.call_latency = call
+        self.rng = rng or random.Random()
+        self.bridge_throughput = bridge_throughput or {}
+
+    def call(self, container: object, method: str) -> float:
+        return self.call_latency.sample(self.rng)
+
+    def bridge(self, adapter: BridgeAdapter, instruction: BridgeInstruction) -> float:
+        latency = self.bridge_latency[type(adapter)].sample(self.rng)
+        throughput = self.bridge_throughput.get(type(adapter))
+        return latency + instruction.amount / throughput if throughput else latency
+
+    def message(self, message: Message) -> float:
+        return self.message_latency.sample(self.rng)
+
+
+class SimulatedLogic(Logic):
+    """Logic with NAV equal to entered liquidity instead of technical constant growth"""
+    def __init__(self):
+        self.liquidity = 0
+
+    def enter(self, tokens: list[ERC20], amounts: list[int]) -> int:
+        self.liquidity += sum(amounts)
+        return sum(amounts)
+
+    def nav(self) -> int:
+        return self.liquidity
+
+    def underlying_liquidity_amount(self) -> int:
+        return self.liquidity
+
+
+class LayerZeroEndpoint(LayerZero):
+    """LayerZero endpoint on principal chain forwarding received container messages to principal"""
+    def __init__(self, principal: PrincipalContainer, on_receive):
+        self.principal = principal
+        self.on_receive = on_receive
+
+    def _receive_message(self, message: ContainerMessage):
+        self.principal._dispatch_message(message)
+        self.on_receive(self.principal)
+
+
+class SimulatedContainer:
+    """
+    Principal/agent pair with bridge legs and per-batch progress
+
+    :planner: splits batch amount across legs, None - even split over all legs
+    """
+    def __init__(
+        self,
+        principal: PrincipalContainer,
+        agent: AgentContainer,
+        legs: list[tuple[BridgeAdapter, BridgeAdapter]],
+        logics: list[Logic],
+        planner: BridgeRoutePlanner | None = None,
+    ):
+        self.principal = principal
+        self.agent = agent
+        self.legs = legs
+        self.logics = logics
+        self.planner = planner
+        self.remotes = dict(legs)
+        self.arrivals: list[tuple[float, int]] = []
+        self.expected_arrivals = 0
+
+
+class SimulationReport:
+    """
+    :batch_latencies: batch cycle latency (start processing -> finish) per batch, virtual seconds
+    :bridge_idle_time: sum over bridge legs of time between arrival and claim, virtual seconds
+    :bridge_idle_capital: sum over bridge legs of amount * idle time, token-seconds
+    """
+    def __init__(self):
+        self.batch_latencies: list[float] = []
+        self.deposits: int = 0
+        self.deposited_amount: int = 0
+        self.bridge_legs: int = 0
+        self.bridge_idle_time: float = 0.0
+        self.bridge_idle_capital: float = 0.0
+        self.virtual_time: float = 0.0
+        self.wall_time: float = 0.0
+        self.events: int = 0
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile of batch latency, q in [0, 100]"""
+        if not self.batch_latencies:
+            return 0.0
+        ordered = sorted(self.batch_latencies)
+        rank = max(math.ceil(q / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    @property
+    def deposits_per_second(self) -> float:
+        return self.deposits / self.virtual_time if self.virtual_time else 0.0
+
+    def summary(self) -> dict:
+        batches = len(self.batch_latencies)
+        return {
+            "batches": batches,
+            "deposits": self.deposits,
+            "batch_latency_p50": self.percentile(50),
+            "batch_latency_p90": self.percentile(90),
+            "batch_latency_p99": self.percentile(99),
+            "batch_latency_max": self.percentile(100),
+            "bridge_idle_time_mean": self.bridge_idle_time / self.bridge_legs if self.bridge_legs else 0.0,
+            "bridge_idle_capital": self.bridge_idle_capital,
+            "deposits_per_second": self.deposits_per_second,
+            "virtual_time": self.virtual_time,
+            "wall_time": self.wall_time,
+            "batches_per_wall_second": batches / self.wall_time if self.wall_time else 0.0,
+            "events": self.events,
+        }
+
+
+class MultiChainSimulation:
+    """
+    Deposit batch cycles over vault with containers on remote chains.
+
+    Users deposit as Poisson process with deposit_rate per second. Batch starts batch_interval
+    after previous one finished (or as soon as deposits arrive). Every container receives its
+    weighted part through its bridge legs, claims after all legs arrived, enters logics
+    and confirms through LayerZero; vault finishes and settles batch after last confirmation.
+
+    :adapters: bridge adapter classes used by every container, container amount is split between them
+    :bridge_models: BridgeModel per adapter class; when set, amount is split by BridgeRoutePlanner
+        with bridge_objective instead of evenly
+    """
+    def __init__(
+        self,
+        containers: int = 4,
+        adapters: tuple[type, ...] = (AcrossBridgeAdapter, CCTPBridgeAdapter),
+        logics_per_agent: int = 2,
+        latency: DistributionLatency | None = None,
+        deposit_rate: float = 1.0,
+        deposit_amount: Distribution = Uniform(100, 10_000),
+        batch_interval: float = 60.0,
+        seed: int = 0,
+        bridge_models: dict[type, BridgeModel] | None = None,
+        bridge_objective: str = BridgeRoutePlanner.TIME,
+    ):
+        self.rng = random.Random(seed)
+        self.latency = latency or DistributionLatency(
+            bridge={AcrossBridgeAdapter: LogNormal(120, 0.5), CCTPBridgeAdapter: LogNormal(900, 0.2)},
+            message=LogNormal(60, 0.3),
+            call=Constant(12),
+        )
+        self.latency.rng = self.rng
+        self.deposit_rate = deposit_rate
+        self.deposit_amount = deposit_amount
+        self.batch_interval = batch_interval
+
+        self.clock = VirtualClock()
+        self.report = SimulationReport()
+        self.notion = ERC20(address="0x01", name="USDC")
+        self.remote_notion = ERC20(address="0x03", name="USDC")
+        self.vault = Vault(self.notion)
+        router = SwapRouter()
+
+        weight = self.vault.PRECISION // containers
+        self.containers: list[SimulatedContainer] = []
+        self.endpoints: dict[PrincipalContainer, LayerZeroEndpoint] = dict()
+        for _ in range(containers):
+            principal = PrincipalContainer(vault=self.vault, swap_router=router, notion=self.notion)
+            agent = AgentContainer(swap_router=router, notion=self.remote_notion)
+            logics = [SimulatedLogic() for _ in range(logics_per_agent)]
+            for logic in logics:
+                agent.setLogic(logic, True)
+            legs = [(adapter(), adapter()) for adapter in adapters]
+            planner = None
+            if bridge_models is not None:
+                planner = BridgeRoutePlanner({source: bridge_models[type(source)] for source, _ in legs}, bridge_objective)
+            self.vault.add_container(principal, weight)
+            self.containers.append(SimulatedContainer(principal, agent, legs, logics, planner))
+            self.endpoints[principal] = LayerZeroEndpoint(principal, self._on_confirmation)
+
+        self._batch_in_flight = False
+        self._batch_started_at = 0.0
+        self._batch_deposits = 0
+        self._open_deposits = 0
+        self._confirmed = 0
+        self._target_batches = 0
+
+    def run(self, batches: int) -> SimulationReport:
+        self._target_batches = batches
+        started = time.perf_counter()
+        self.clock.schedule(self._next_deposit_delay(), self._on_deposit)
+        self.clock.run(stop=self._done)
+        self.report.wall_time = time.perf_counter() - started
+        self.report.virtual_time = self.clock.now
+        self.report.events = self.clock.events_processed
+        return self.report
+
+    def _done(self) -> bool:
+        return len(self.report.batch_latencies) >= self._target_batches
+
+    def _next_deposit_delay(self) -> float:
+        return self.rng.expovariate(self.deposit_rate)
+
+    # Users
+    def _on_deposit(self) -> None:
+        amount = int(self.deposit_amount.sample(self.rng))
+        self.vault.create_deposit_request(amount)
+        self.report.deposited_amount += amount
+        self._open_deposits += 1
+        if not self._batch_in_flight and self._open_deposits == 1:
+            self.clock.schedule(self.batch_interval, self._start_batch)
+        self.clock.schedule(self._next_deposit_delay(), self._on_deposit)
+
+    # Vault
+    def _start_batch(self) -> None:
+        buffered_amount = self.vault.deposit_batch.buffered_amount
+        self.vault.start_current_deposit_batch_processing()
+        self._batch_in_flight = True
+        self._batch_started_at = self.clock.now
+        self._batch_deposits = self._open_deposits
+        self._open_deposits = 0
+        self._confirmed = 0
+        for container in self.containers:
+            amount = buffered_amount * self.vault.weights[container.principal] // self.vault.PRECISION
+            self.clock.schedule(self.latency.call(container.principal, "start_enter"), self._start_enter, container, amount)
+
+    def _finish_batch(self) -> None:
+        batch_id = self.vault.pending_deposit_batch.id
+        self.vault.finish_deposit_batch_processing()
+        self.vault.settle_deposit_batch(batch_id)
+        self.report.batch_latencies.append(self.clock.now - self._batch_started_at)
+        self.report.deposits += self._batch_deposits
+        self._batch_in_flight = False
+        if self._open_deposits:
+            self.clock.schedule(self.batch_interval, self._start_batch)
+
+    # Principal chain
+    def _start_enter(self, container: SimulatedContainer, amount: int) -> None:
+        if container.planner is not None:
+            plan = container.planner.plan({self.notion.address: amount})
+            sources, instructions = plan.adapters, plan.instructions
+        else:
+            part = amount // len(container.legs)
+            sources = [source for source, _ in container.legs]
+            instructions = [
+                BridgeInstruction(token=self.notion.address, amount=part + (amount - part * len(container.legs) if i == 0 else 0), payload=bytes())
+                for i in range(len(container.legs))
+            ]
+        container.principal.start_enter([], sources, instructions)
+        container.arrivals = []
+        container.expected_arrivals = len(instructions)
+        if not instructions:
+            self.clock.schedule(self.latency.call(container.agent, "claim_bridge"), self._claim_and_enter, container)
+        for source, instruction in zip(sources, instructions):
+            self.clock.schedule(self.latency.bridge(source, instruction), self._on_bridge_arrival, container, container.remotes[source], instruction.amount)
+
+    def _on_confirmation(self, principal: PrincipalContainer) -> None:
+        self.clock.schedule(self.latency.call(principal, "finalize_enter"), self._finalize_enter, principal)
+
+    def _finalize_enter(self, principal: PrincipalContainer) -> None:
+        principal.finalize_enter([], [])
+        self._confirmed += 1
+        if self._confirmed == len(self.containers):
+            self.clock.schedule(self.latency.call(self.vault, "finish_deposit_batch_processing"), self._finish_batch)
+
+    # Remote chain
+    def _on_bridge_arrival(self, container: SimulatedContainer, remote: BridgeAdapter, amount: int) -> None:
+        deliver_bridge(remote, container.principal.address, self.remote_notion.address, amount)
+        container.arrivals.append((self.clock.now, amount))
+        if len(container.arrivals) == container.expected_arrivals:
+            self.clock.schedule(self.latency.call(container.agent, "claim_bridge"), self._claim_and_enter, container)
+
+    def _claim_and_enter(self, container: SimulatedContainer) -> None:
+        agent = container.agent
+        now = self.clock.now
+        for arrived_at, amount in container.arrivals:
+            self.report.bridge_legs += 1
+            self.report.bridge_idle_time += now - arrived_at
+            self.report.bridge_idle_capital += (now - arrived_at) * amount
+        for _, remote in container.legs:
+            agent.claim_bridge(remote, self.remote_notion.address)
+        agent.prepare_liquidity([])
+
+        amount = sum(amount for _, amount in container.arrivals)
+        per_logic = amount // len(container.logics)
+        for logic in container.logics:
+            agent.enter_logic(logic, [self.remote_notion], [per_logic], 0)
+        agent.finalize_success_enters()
+        for _, message in agent.drain_outbox():
+            if type(message) is SuccessDepositConfirmation:
+                self.clock.schedule(
+                    self.latency.message(message),
+                    self.endpoints[container.principal].lzReceive,
+                    ContainerMessage(type=MessageType.DEPOSIT_CONFIRMATION, data=message.to_bytes()).to_bytes(),
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=10_000)
+    parser.add_argument("--containers", type=int, default=2)
+    parser.add_argument("--deposit-rate", type=float, default=1.0)
+    parser.add_argument("--batch-interval", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    simulation = MultiChainSimulation(
+        containers=args.containers,
+        deposit_rate=args.deposit_rate,
+        batch_interval=args.batch_interval,
+        seed=args.seed,
+    )
+    for key, value in simulation.run(args.batches).summary().items():
+        print(f"{key:<24} {value:,.3f}" if isinstance(value, float) else f"{key:<24} {value:,}")
@@ -1,8 +1,16 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+
 from datastructures import SwapInstruction
 
 
 class SwapAdapter:
     pool: str
+    token0: str
+    token1: str
 
     def doSwap(self, swap: SwapInstruction):
         ...
@@ -11,9 +19,245 @@ class SwapAdapter:
         ...
 
 
+class QuoteCache:
+    """
+    TTL + LRU cache of adapter quotes.
+    Key is (adapter, token_in, token_out, amount bucket); amounts sharing leading
+    bucket_bits bits fall into one bucket and cached quote is scaled linearly to requested amount.
+
+    :hits: lookups answered from cache
+    :misses: lookups not found or expired
+    """
+    ttl: float
+    max_size: int
+    bucket_bits: int
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, ttl: float = 12.0, max_size: int = 4096, bucket_bits: int = 8, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.bucket_bits = bucket_bits
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict() # key -> (expires_at, amount_in, amount_out)
+        self._lock = threading.Lock() # late quotes are stored from worker threads
+
+    def bucket(self, amount: int) -> tuple[int, int]:
+        shift = max(amount.bit_length() - self.bucket_bits, 0)
+        return shift, amount >> shift
+
+    def key(self, adapter: SwapAdapter, swap: SwapInstruction) -> tuple:
+        return adapter, swap.token_in, swap.token_out, self.bucket(swap.amount_in)
+
+    def get(self, adapter: SwapAdapter, swap: SwapInstruction) -> int | None:
+        key = self.key(adapter, swap)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        _, amount_in, amount_out = entry
+        if amount_in == swap.amount_in or amount_in == 0:
+            return amount_out
+        return amount_out * swap.amount_in // amount_in
+
+    def put(self, adapter: SwapAdapter, swap: SwapInstruction, amount_out: int) -> None:
+        key = self.key(adapter, swap)
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, swap.amount_in, amount_out)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, adapter: SwapAdapter | None = None) -> None:
+        """Drop all quotes, or quotes of one adapter"""
+        with self._lock:
+            if adapter is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] is adapter]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SwapNetting:
+    """
+    Result of net_swaps.
+
+    :swaps: reduced swaps, every one at position of its last merged member
+    :swaps_removed: number of swaps merged into other swaps or cancelled
+    :volume_removed: token_in -> amount_in no longer sent to router
+    """
+    swaps: list[SwapInstruction]
+    swaps_removed: int
+    volume_removed: dict[str, int]
+
+    def __init__(self, swaps: list[SwapInstruction], swaps_removed: int, volume_removed: dict[str, int]):
+        self.swaps = swaps
+        self.swaps_removed = swaps_removed
+        self.volume_removed = volume_removed
+
+
+def net_swaps(swaps: list[SwapInstruction]) -> SwapNetting:
+    """
+    Coalesce swaps per directed pair and cancel opposing pairs, keeping swaps which depend on each other in order.
+
+    Swaps of one pair are summed (amount_in and min_amount_out), payload of the largest one is kept;
+    merged swap runs at position of its last member. Merging only delays earlier members, so a swap is not
+    merged across a later swap consuming its token_out (that swap may need output of the earlier one).
+    Opposing swaps A->B (a, b_min) and B->A (b, a_min) adjacent after merging guarantee deltas
+    A: a_min - a, B: b_min - b. They are replaced only when replacement guarantees both deltas too:
+    both dropped if a >= a_min and b >= b_min; residual A->B (a - a_min, b_min - b) if a > a_min and b_min > b;
+    symmetric residual B->A (b - b_min, a_min - a). Residual rate must not be stricter than rate of original swap
+    in its direction (a_min * b_min <= a * b), otherwise it could fail where originals pass: pair is kept un-netted.
+    Pairs with min_amount_out = 0 have no implied rate and are not netted.
+    """
+    groups: list[list] = [] # [amount_in, min_amount_out, largest swap, last position] in order of first member
+    open_groups: dict[tuple[str, str], list] = dict() # (token_in, token_out) -> group new swaps of pair merge into
+    for position, swap in enumerate(swaps):
+        if swap.amount_in == 0:
+            continue
+        for pair in [pair for pair in open_groups if pair[1] == swap.token_in]:
+            del open_groups[pair] # swap consumes their output, they can not run later than it
+        group = open_groups.get((swap.token_in, swap.token_out))
+        if group is None:
+            group = open_groups[(swap.token_in, swap.token_out)] = [swap.amount_in, swap.min_amount_out, swap, position]
+            groups.append(group)
+            continue
+        group[0] += swap.amount_in
+        group[1] += swap.min_amount_out
+        group[3] = position
+        if swap.amount_in > group[2].amount_in:
+            group[2] = swap
+
+    netted: list[list] = []
+    for amount_in, min_amount_out, largest, _ in sorted(groups, key=lambda group: group[3]):
+        previous = netted[-1] if netted else None
+        if (
+            previous is None
+            or (previous[2].token_in, previous[2].token_out) != (largest.token_out, largest.token_in)
+            or previous[1] == 0 or min_amount_out == 0
+        ):
+            netted.append([amount_in, min_amount_out, largest])
+            continue
+        a, b_min, forward = previous
+        b, a_min = amount_in, min_amount_out
+        if a >= a_min and b >= b_min:
+            netted.pop()
+        elif a_min * b_min > a * b:
+            netted.append([amount_in, min_amount_out, largest])
+        elif a > a_min and b_min > b:
+            netted[-1] = [a - a_min, b_min - b, forward]
+        elif b > b_min and a_min > a:
+            netted[-1] = [b - b_min, a_min - a, largest]
+        else:
+            netted.append([amount_in, min_amount_out, largest])
+
+    reduced = [
+        SwapInstruction(amount_in=amount_in, min_amount_out=min_amount_out, token_in=largest.token_in, token_out=largest.token_out, payload=largest.payload)
+        for amount_in, min_amount_out, largest in netted
+        if amount_in > 0
+    ]
+    volume_removed: dict[str, int] = dict()
+    for swap in swaps:
+        volume_removed[swap.token_in] = volume_removed.get(swap.token_in, 0) + swap.amount_in
+    for swap in reduced:
+        volume_removed[swap.token_in] -= swap.amount_in
+    return SwapNetting(reduced, len(swaps) - len(reduced), {token: amount for token, amount in volume_removed.items() if amount})
+
+
+class PoolGraph:
+    """
+    Token adjacency over whitelisted pools: token -> neighbour token -> adapters of that pair.
+    Adapters are added and removed one by one, graph is never rebuilt.
+    """
+    def __init__(self):
+        self.edges: dict[str, dict[str, list[SwapAdapter]]] = dict()
+
+    def add(self, adapter: SwapAdapter) -> None:
+        for token_in, token_out in ((adapter.token0, adapter.token1), (adapter.token1, adapter.token0)):
+            adapters = self.edges.setdefault(token_in, dict()).setdefault(token_out, [])
+            if adapter not in adapters:
+                adapters.append(adapter)
+
+    def remove(self, adapter: SwapAdapter) -> None:
+        for token_in, token_out in ((adapter.token0, adapter.token1), (adapter.token1, adapter.token0)):
+            neighbours = self.edges.get(token_in)
+            if neighbours is None or adapter not in neighbours.get(token_out, ()):
+                continue
+            neighbours[token_out].remove(adapter)
+            if not neighbours[token_out]:
+                del neighbours[token_out]
+            if not neighbours:
+                del self.edges[token_in]
+
+    def neighbours(self, token: str) -> dict[str, list[SwapAdapter]]:
+        return self.edges.get(token, {})
+
+
+class Route:
+    """
+    Swap path found by SwapRouter.findRoute.
+
+    :tokens: token_in, intermediate tokens..., token_out
+    :adapters: best adapter of every hop
+    :amounts: quoted amount entering every hop, last item - quoted amount out
+    """
+    tokens: list[str]
+    adapters: list[SwapAdapter]
+    amounts: list[int]
+
+    def __init__(self, tokens: list[str], adapters: list[SwapAdapter], amounts: list[int]):
+        self.tokens = tokens
+        self.adapters = adapters
+        self.amounts = amounts
+
+    @property
+    def amount_out(self) -> int:
+        return self.amounts[-1]
+
+    def __len__(self) -> int:
+        return len(self.adapters)
+
+
 class SwapRouter:
+    """
+    :quote_timeout: seconds to wait for adapter quotes in quoteBest, slower adapters are dropped
+    :quote_cache: TTL/LRU cache shared by all quotes of router
+    """
     whitelistedSwapAdapters: dict[SwapAdapter, bool]
     adaptersList: list[SwapAdapter]
+    quote_timeout: float
+    quote_cache: QuoteCache
+
+    def __init__(self, quote_timeout: float = 1.0, quote_cache: QuoteCache | None = None, max_quote_workers: int = 16):
+        self.whitelistedSwapAdapters = dict()
+        self.adaptersList = []
+        self.quote_timeout = quote_timeout
+        self.quote_cache = quote_cache if quote_cache is not None else QuoteCache()
+        self.max_quote_workers = max_quote_workers
+        self._quote_executor: ThreadPoolExecutor | None = None
+        self._quotes_in_flight: dict[SwapAdapter, Future] = dict()
+        self.pool_graph = PoolGraph()
+
+    def setAdapter(self, swap_adapter: SwapAdapter, is_whitelisted: bool) -> None:
+        """Whitelist or remove adapter, pool graph and quote cache are updated for this adapter only"""
+        self.whitelistedSwapAdapters[swap_adapter] = is_whitelisted
+        if is_whitelisted:
+            if swap_adapter not in self.adaptersList:
+                self.adaptersList.append(swap_adapter)
+            self.pool_graph.add(swap_adapter)
+        else:
+            if swap_adapter in self.adaptersList:
+                self.adaptersList.remove(swap_adapter)
+            self.pool_graph.remove(swap_adapter)
+            self.quote_cache.invalidate(swap_adapter)
 
     def swapViaAdapter(self, swap_adapter: SwapAdapter, swap: SwapInstruction):
         ...
@@ -25,8 +269,102 @@ class SwapRouter:
         ...
 
     def quoteBest(self, swap: SwapInstruction) -> int:
-        quotes = []
-        for adapter in self.adaptersList:
-            quotes.append(adapter.quoteSwap(swap))
-        return max(quotes)
+        quotes = self.quoteAll(swap)
+        if not quotes:
+            raise ValueError("No quotes received")
+        return max(quotes.values())
+
+    def findRoute(self, token_in: str, token_out: str, amount_in: int, max_hops: int = 3) -> Route | None:
+        """
+        Best path by quoted output with at most max_hops swaps.
+        Depth-first search over pool graph; every hop is quoted through quoteAll on adapters
+        of that pair (cache first). Branch is cut when token was already reached
+        with more output in not more hops.
+        """
+        best: Route | None = None
+        reached: dict[str, tuple[int, int]] = {token_in: (amount_in, 0)} # token -> (best amount, hops)
+        stack = [([token_in], [], [amount_in])]
+        while stack:
+            tokens, adapters, amounts = stack.pop()
+            token, amount = tokens[-1], amounts[-1]
+            for neighbour, pair_adapters in self.pool_graph.neighbours(token).items():
+                if neighbour in tokens:
+                    continue
+                hop = SwapInstruction(amount_in=amount, min_amount_out=0, token_in=token, token_out=neighbour, payload=bytes())
+                quotes = self.quoteAll(hop, pair_adapters)
+                if not quotes:
+                    continue
+                adapter = max(quotes, key=quotes.get)
+                amount_out = quotes[adapter]
+                hops = len(adapters) + 1
+                best_reached = reached.get(neighbour)
+                if best_reached is not None and best_reached[0] >= amount_out and best_reached[1] <= hops:
+                    continue
+                reached[neighbour] = (amount_out, hops)
+                route = ([*tokens, neighbour], [*adapters, adapter], [*amounts, amount_out])
+                if neighbour == token_out:
+                    if best is None or amount_out > best.amount_out:
+                        best = Route(*route)
+                elif hops < max_hops:
+                    stack.append(route)
+        return best
+
+    def routeInstructions(self, route: Route, slippage_bps: int) -> list[SwapInstruction]:
+        """
+        Swap instructions of route. Every hop spends only guaranteed output of previous hop:
+        amount_in of hop = min_amount_out of previous hop, quotes are rescaled to that amount.
+        Payload carries pool of chosen adapter.
+        """
+        instructions = []
+        amount_in = route.amounts[0]
+        for i, adapter in enumerate(route.adapters):
+            quoted_in, quoted_out = route.amounts[i], route.amounts[i + 1]
+            expected_out = quoted_out * amount_in // quoted_in if quoted_in else 0
+            min_amount_out = expected_out * (10_000 - slippage_bps) // 10_000
+            instructions.append(SwapInstruction(
+                amount_in=amount_in,
+                min_amount_out=min_amount_out,
+                token_in=route.tokens[i],
+                token_out=route.tokens[i + 1],
+                payload=adapter.pool.encode(),
+            ))
+            amount_in = min_amount_out
+        return instructions
+
+    def quoteAll(self, swap: SwapInstruction, adapters: list[SwapAdapter] | None = None) -> dict[SwapAdapter, int]:
+        """
+        Quotes of every adapter (or of given adapters) for swap.
+        Cached quotes are served from cache, the rest are requested concurrently;
+        adapters which failed or did not answer within quote_timeout are left out.
+        Adapter with quote still in flight from previous call is skipped, so slow adapters
+        hold at most one worker; their late answers still land in cache.
+        """
+        quotes = dict()
+        futures = dict()
+        for adapter in self.adaptersList if adapters is None else adapters:
+            cached = self.quote_cache.get(adapter, swap)
+            if cached is not None:
+                quotes[adapter] = cached
+            elif adapter not in self._quotes_in_flight:
+                future = self._executor().submit(adapter.quoteSwap, swap)
+                self._quotes_in_flight[adapter] = future
+                future.add_done_callback(partial(self._on_quote, adapter, swap))
+                futures[future] = adapter
+        if not futures:
+            return quotes
+
+        done, _ = wait(futures, timeout=self.quote_timeout)
+        for future in done:
+            if future.exception() is None and future.result() is not None:
+                quotes[futures[future]] = future.result()
+        return quotes
+
+    def _on_quote(self, adapter: SwapAdapter, swap: SwapInstruction, future: Future) -> None:
+        self._quotes_in_flight.pop(adapter, None)
+        if future.exception() is None and future.result() is not None:
+            self.quote_cache.put(adapter, swap, future.result())
 
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._quote_executor is None:
+            self._quote_executor = ThreadPoolExecutor(max_workers=self.max_quote_workers, thread_name_prefix="quote")
+        return self._quote_executor
@@ -0,0 +1,260 @@
+"""
+Monte Carlo sweep over container weights, deposit sizes, rewards and failure rates.
+
+Every run builds its own Vault with plain containers (as scripts/vault_enter.py does),
+plays deposit batches with container callbacks and records share price, rounding dust
+and remainder statistics. Runs are independent and are spread over ProcessPoolExecutor
+in chunks, results are aggregated per scenario.
+
+Run from repository root:
+    PYTHONPATH=. python sweep.py --repetitions 100 --workers 8
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from containers import Container
+from datastructures import ERC20
+from swap_router import SwapRouter
+from vault import Vault
+
+
+class Scenario:
+    """
+    :weights: container weights, vault PRECISION based
+    :deposit_size: (min, max) user deposit, sampled uniformly
+    :deposits_per_batch: user deposits in every batch
+    :reward: harvest yield of container NAV per batch (0.001 = 10 bps)
+    :failure_rate: probability that batch enter fails and is fully reverted
+    :batches: deposit batches per run
+    """
+    def __init__(
+        self,
+        weights: tuple[int, ...],
+        deposit_size: tuple[int, int],
+        reward: float,
+        failure_rate: float,
+        deposits_per_batch: int = 10,
+        batches: int = 20,
+    ):
+        self.weights = tuple(weights)
+        self.deposit_size = tuple(deposit_size)
+        self.reward = reward
+        self.failure_rate = failure_rate
+        self.deposits_per_batch = deposits_per_batch
+        self.batches = batches
+
+    def key(self) -> tuple:
+        return self.weights, self.deposit_size, self.reward, self.failure_rate, self.deposits_per_batch, self.batches
+
+    def __repr__(self) -> str:
+        return (
+            f"Scenario(weights={self.weights}, deposit_size={self.deposit_size}, reward={self.reward}, "
+            f"failure_rate={self.failure_rate})"
+        )
+
+
+class RunResult:
+    """
+    :share_price: container NAV per share after last batch
+    :allocation_dust: notion left in vault by weights rounding in start_current_deposit_batch_processing
+    :share_dust: batch shares not distributed to positions by floor rounding
+    :remainder_dust: reverted batch notion not claimable by positions by floor rounding
+    """
+    def __init__(self, scenario_key: tuple, share_price: float, allocation_dust: int, share_dust: int, remainder_dust: int, failed_batches: int):
+        self.scenario_key = scenario_key
+        self.share_price = share_price
+        self.allocation_dust = allocation_dust
+        self.share_dust = share_dust
+        self.remainder_dust = remainder_dust
+        self.failed_batches = failed_batches
+
+
+def run_scenario(scenario: Scenario, seed: int) -> RunResult:
+    """One independent vault simulation. Top-level function so it can be pickled into workers"""
+    rng = random.Random(seed)
+    notion = ERC20(address="0x01", name="USDC")
+    router = SwapRouter()
+    vault = Vault(notion)
+    containers = [Container(swap_router=router, notion=notion) for _ in scenario.weights]
+    for container, weight in zip(containers, scenario.weights):
+        vault.add_container(container, weight)
+    container_navs = [0] * len(containers)
+
+    allocation_dust = share_dust = remainder_dust = failed_batches = 0
+    for _ in range(scenario.batches):
+        for _ in range(scenario.deposits_per_batch):
+            vault.create_deposit_request(rng.randint(*scenario.deposit_size))
+        batch_id = vault.deposit_batch.id_
+        buffered_amount = vault.deposit_batch.buffered_amount
+        vault.start_current_deposit_batch_processing()
+        amounts = [buffered_amount * weight // vault.PRECISION for weight in scenario.weights]
+        allocation_dust += buffered_amount - sum(amounts)
+
+        if rng.random() < scenario.failure_rate:
+            failed_batches += 1
+            for amount in amounts:
+                if amount == 0:
+                    continue # container got nothing in batch, vault does not wait for it
+                vault.deposit_container_callback(nav_after_harvest=0, nav_after_harvest_and_enter=0, notion_token_remainder=amount)
+            vault.finish_deposit_batch_processing()
+            claimed = sum(vault.claim_remainder_after_deposit(position_id) for position_id in vault.deposit_batch_positions(batch_id))
+            remainder_dust += vault.depositBatchRemainders[batch_id] - claimed
+            continue
+
+        for i, amount in enumerate(amounts):
+            nav_after_harvest = container_navs[i] + int(container_navs[i] * scenario.reward)
+            container_navs[i] = nav_after_harvest + amount
+            if amount == 0:
+                continue
+            vault.deposit_container_callback(
+                nav_after_harvest=nav_after_harvest,
+                nav_after_harvest_and_enter=container_navs[i],
+                notion_token_remainder=0,
+            )
+        vault.finish_deposit_batch_processing()
+        settled = vault.settle_deposit_batch(batch_id)
+        share_dust += vault.depositBatchShares[batch_id] - settled
+
+    share_price = sum(container_navs) / vault.total_shares if vault.total_shares else 0.0
+    return RunResult(scenario.key(), share_price, allocation_dust, share_dust, remainder_dust, failed_batches)
+
+
+def _run_chunk(tasks: list[tuple[Scenario, int]]) -> list[RunResult]:
+    return [run_scenario(scenario, seed) for scenario, seed in tasks]
+
+
+class ScenarioSummary:
+    """Statistics of all repetitions of one scenario"""
+    def __init__(self, scenario: Scenario, results: list[RunResult]):
+        self.scenario = scenario
+        self.runs = len(results)
+        self.share_price = _stats([result.share_price for result in results])
+        self.allocation_dust = _stats([result.allocation_dust for result in results])
+        self.share_dust = _stats([result.share_dust for result in results])
+        self.remainder_dust = _stats([result.remainder_dust for result in results])
+        self.failed_batches = _stats([result.failed_batches for result in results])
+
+    def as_dict(self) -> dict:
+        return {
+            "scenario": repr(self.scenario),
+            "runs": self.runs,
+            "share_price": self.share_price,
+            "allocation_dust": self.allocation_dust,
+            "share_dust": self.share_dust,
+            "remainder_dust": self.remainder_dust,
+            "failed_batches": self.failed_batches,
+        }
+
+
+def _stats(values: list) -> dict:
+    return {
+        "mean": statistics.fmean(values),
+        "stdev": statistics.pstdev(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+def grid(
+    weights: list[tuple[int, ...]],
+    deposit_sizes: list[tuple[int, int]],
+    rewards: list[float],
+    failure_rates: list[float],
+    **kwargs,
+) -> list[Scenario]:
+    """Full cartesian product of parameters"""
+    return [
+        Scenario(w, d, r, f, **kwargs)
+        for w, d, r, f in itertools.product(weights, deposit_sizes, rewards, failure_rates)
+    ]
+
+
+def random_scenarios(
+    count: int,
+    containers: tuple[int, int],
+    deposit_size: tuple[int, int],
+    reward: tuple[float, float],
+    failure_rate: tuple[float, float],
+    seed: int = 0,
+    precision: int = Vault.PRECISION,
+    **kwargs,
+) -> list[Scenario]:
+    """Random sample of parameter space, weights are random partition of precision"""
+    rng = random.Random(seed)
+    scenarios = []
+    for _ in range(count):
+        n = rng.randint(*containers)
+        cuts = sorted(rng.sample(range(1, precision), n - 1))
+        weights = tuple(b - a for a, b in zip([0] + cuts, cuts + [precision]))
+        low = rng.randint(*deposit_size)
+        scenarios.append(Scenario(
+            weights=weights,
+            deposit_size=(low, rng.randint(low, deposit_size[1])),
+            reward=rng.uniform(*reward),
+            failure_rate=rng.uniform(*failure_rate),
+            **kwargs,
+        ))
+    return scenarios
+
+
+class SweepRunner:
+    """
+    Spreads (scenario, seed) runs over process pool.
+    Runs are grouped in chunks so each worker gets few large tasks: per-task pickling
+    and scheduling stays small against simulation time, which keeps scaling close to linear.
+    """
+    def __init__(self, workers: int | None = None, chunks_per_worker: int = 4):
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+
+    def run(self, scenarios: list[Scenario], repetitions: int, seed: int = 0) -> list[ScenarioSummary]:
+        tasks = [
+            (scenario, seed * 1_000_003 + i * repetitions + repetition)
+            for i, scenario in enumerate(scenarios)
+            for repetition in range(repetitions)
+        ]
+        workers = self.workers or os.cpu_count() or 1
+        chunk_size = max(math.ceil(len(tasks) / (workers * self.chunks_per_worker)), 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+            results: dict[tuple, list[RunResult]] = dict()
+            for chunk_results in executor.map(_run_chunk, chunks):
+                for result in chunk_results:
+                    results.setdefault(result.scenario_key, []).append(result)
+        return [ScenarioSummary(scenario, results[scenario.key()]) for scenario in scenarios]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repetitions", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--random", type=int, default=0, help="sample N random scenarios instead of grid")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.random:
+        scenarios = random_scenarios(args.random, (1, 8), (10, 100_000), (0.0, 0.01), (0.0, 0.2), seed=args.seed)
+    else:
+        scenarios = grid(
+            weights=[(500, 500), (250, 250, 250, 250), (333, 333, 334), (700, 200, 100)],
+            deposit_sizes=[(1, 100), (100, 100_000)],
+            rewards=[0.0, 0.001],
+            failure_rates=[0.0, 0.1],
+        )
+    started = time.perf_counter()
+    summaries = SweepRunner(workers=args.workers).run(scenarios, args.repetitions, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    for summary in summaries:
+        print(
+            f"{summary.scenario!r:<100} price={summary.share_price['mean']:.6f}±{summary.share_price['stdev']:.6f} "
+            f"alloc_dust={summary.allocation_dust['mean']:.1f} share_dust={summary.share_dust['mean']:.1f} "
+            f"remainder_dust={summary.remainder_dust['mean']:.1f}"
+        )
+    runs = len(scenarios) * args.repetitions
+    print(f"{runs} runs in {elapsed:.2f}s ({runs / elapsed:.0f} runs/s)")
@@ -3,12 +3,14 @@ from collections import defaultdict
 from containers import Container
 from datastructures import (
     ERC20,
+    CallbackBitmap,
     ERC721,
     Address,
     DepositBatch,
     PendingDepositBatch,
     PendingWithdrawalBatch,
-    Position,
+    PositionOwners,
+    PositionTable,
     WithdrawalBatch,
 )
 from errors import AuthError, NotEnoughShares
@@ -24,37 +26,120 @@ class Vault(ERC721):
     nav: int = 0
 
 
-    positions: dict[int, Position] = dict() # position_id -> position data
-    positionOwners: dict[int, Address] = dict()
+    positions: PositionTable # position_id -> position data
     last_position_index: int = 0
 
 
     # Batch states
-    deposit_batch: DepositBatch = DepositBatch()
-    pending_deposit_batch: PendingDepositBatch = PendingDepositBatch()
-    withdrawal_batch: WithdrawalBatch = WithdrawalBatch()
-    pending_withdrawal_batch: PendingWithdrawalBatch = PendingWithdrawalBatch()
+    deposit_batch: DepositBatch
+    pending_deposit_batches: dict[int, PendingDepositBatch] # batch_id -> batch in flight, in start order
+    withdrawal_batch: WithdrawalBatch
+    pending_withdrawal_batch: PendingWithdrawalBatch
 
     # containers
-    containers: list[Container] = []
-    weights: dict[Container, int] = dict()
+    containers: list[Container]
+    containerIndexes: dict[Container, int] # container -> index (bit) in batch callback bitmaps
+    weights: dict[Container, int]
     PRECISION: int = 1000
 
     # Batch processing
-    depositBatchNotionSent: dict[int, int] = dict()
-    depositBatchShares: dict[int, int] = dict() # batch_id -> batch shares
-    depositBatchRemainders: dict[int, int] = dict() # batch_id -> remainder
+    depositBatchNotionSent: dict[int, int]
+    depositBatchShares: dict[int, int] # batch_id -> batch shares with netted ones, reverted batch has none (see depositBatchNetted)
+    depositBatchRemainders: dict[int, int] # batch_id -> remainder
 
-    withdrawalBatchShares: dict[int, int] = defaultdict(int) # withdrawal_batch_id -> shares
-    withdrawalBatchNAVs: dict[int, int] = defaultdict(int)
+    withdrawalBatchShares: dict[int, int] # withdrawal_batch_id -> shares
+    withdrawalBatchNAVs: dict[int, int]
+    finishedWithdrawalBatches: set[int] # withdrawal batch ids finish_withdrawal_batch_processing ran for
+
+    # Netting inside vault
+    depositBatchNetted: dict[int, tuple[int, int]] # batch_id -> (notion, shares) settled against withdrawals
+    withdrawalBatchNetted: dict[int, tuple[int, int]] # withdrawal_batch_id -> (shares, notion) settled against deposits
 
     def __init__(self, notion: ERC20):
+        """All mutable state is per instance, vaults in one process are independent"""
         self.notion = notion
+        self.positions = PositionTable()
+
+        self.deposit_batch = DepositBatch()
+        self.pending_deposit_batches = dict()
+        self._last_pending_deposit_batch = PendingDepositBatch()
+        self.withdrawal_batch = WithdrawalBatch()
+        self.pending_withdrawal_batch = PendingWithdrawalBatch()
+
+        self.containers = []
+        self.containerIndexes = dict()
+        self.weights = dict()
+
+        self.depositBatchNotionSent = dict()
+        self.depositBatchShares = dict()
+        self.depositBatchRemainders = dict()
+        self.withdrawalBatchShares = defaultdict(int)
+        self.withdrawalBatchNAVs = defaultdict(int)
+        self.finishedWithdrawalBatches = set()
+        self.depositBatchNetted = dict()
+        self.withdrawalBatchNetted = dict()
+
+    @property
+    def positionOwners(self) -> PositionOwners:
+        return self.positions.owners
+
+    @property
+    def pending_deposit_batch(self) -> PendingDepositBatch:
+        """Oldest batch in flight (next one to finish), last finished batch if none is in flight. Read only"""
+        for batch in self.pending_deposit_batches.values():
+            return batch
+        return self._last_pending_deposit_batch
+
+    def _pending_deposit(self, batch_id: int | None) -> PendingDepositBatch:
+        """Batch in flight for state changes, oldest one by default; finished batches are never returned"""
+        if batch_id is None:
+            if not self.pending_deposit_batches:
+                raise Exception("No deposit batch in processing")
+            return self.pending_deposit_batch
+        if batch_id not in self.pending_deposit_batches:
+            raise Exception("Batch is not in processing")
+        return self.pending_deposit_batches[batch_id]
 
     def add_container(self, container: Container, weight: int) -> None:
+        if container in self.containerIndexes:
+            raise Exception("Container already added")
+        self.containerIndexes[container] = len(self.containers)
         self.containers.append(container)
         self.weights[container] = weight
 
+    def _callback_index(self, callbacks: CallbackBitmap, container: Container | None) -> int:
+        """
+        Index of container sending callback, rejects duplicates
+        :param container: sender, None - next container which has not sent callback yet ("msg.sender");
+            anonymous callback is rejected once every registered container is marked
+        """
+        if container is None:
+            if callbacks.complete(len(self.containers)):
+                raise Exception("All containers already processed")
+            return callbacks.first_missing(len(self.containers))
+        index = self.containerIndexes.get(container)
+        if index is None:
+            raise Exception("Container is not registered")
+        if callbacks.received(index):
+            raise Exception("Container callback already received")
+        return index
+
+    def _restarted_callbacks(self, pending_batch: PendingDepositBatch) -> CallbackBitmap:
+        """Callbacks of deposit batch after failed enter: only containers without allocation stay processed"""
+        callbacks = CallbackBitmap()
+        callbacks.mark_all(pending_batch.idle_containers)
+        return callbacks
+
+    def missing_deposit_callbacks(self, batch_id: int | None = None) -> list[Container]:
+        """Containers which have not confirmed deposit batch yet"""
+        callbacks = self._pending_deposit(batch_id).callbacks
+        return [self.containers[index] for index in callbacks.missing(len(self.containers))]
+
+    def missing_withdrawal_callbacks(self) -> list[Container]:
+        """Containers which have not sent notion of pending withdrawal batch yet"""
+        callbacks = self.pending_withdrawal_batch.callbacks
+        return [self.containers[index] for index in callbacks.missing(len(self.containers))]
+
     def create_deposit_request(self, amount: int) -> None:
         """
         User deposits amount of notion token in current batch.
@@ -65,16 +150,17 @@ class Vault(ERC721):
         """
         self.notion.transferFrom("msg.sender", "address(this)", amount)
         self.deposit_batch.buffered_amount += amount
-        self.positions[self.last_position_index] = Position(
+        self.positions.append(
+            owner="msg.sender",
             notion_amount=amount,
             deposit_batch_id=self.deposit_batch.id_,
         )
-        self.positionOwners[self.last_position_index] = "msg.sender"
         self.last_position_index += 1
 
     def start_current_deposit_batch_processing(self) -> None:
         """
-        Distribute current batch between containers
+        Distribute current batch between containers.
+        Batches already in flight are kept, new batch is added to pending_deposit_batches
         :return:
         """
         buffered_amount = self.deposit_batch.buffered_amount
@@ -82,12 +168,48 @@ class Vault(ERC721):
 
         self.deposit_batch.buffered_amount = 0
         self.deposit_batch.id_ += 1
-        self.pending_deposit_batch.id = current_deposit_batch_id
-        self.pending_deposit_batch.batch_nav = buffered_amount
+        pending_batch = PendingDepositBatch()
+        pending_batch.id = current_deposit_batch_id
+        pending_batch.batch_nav = buffered_amount
+        self.pending_deposit_batches[current_deposit_batch_id] = pending_batch
 
-        for container in self.containers:
+        for index, container in enumerate(self.containers):
             amount = buffered_amount * self.weights[container] // self.PRECISION
+            if amount == 0:
+                pending_batch.idle_containers |= 1 << index
             self.notion.transfer(container.address, amount)
+        pending_batch.callbacks.mark_all(pending_batch.idle_containers)
+
+    def net_current_batches(self) -> tuple[int, int]:
+        """
+        Net current deposit batch against current withdrawal batch before both start processing.
+        Withdrawal demand is valued at pre-harvest share price (nav / total_shares): matched notion stays
+        in vault for withdrawers, matched shares pass from withdrawers to depositors without mint or burn.
+        Only residuals go through containers in start_current_deposit_batch_processing
+        and start_current_withdrawal_batch_processing.
+        :return: (matched notion, matched shares)
+        """
+        buffered_amount = self.deposit_batch.buffered_amount
+        withdrawal_shares = self.withdrawal_batch.batch_shares_amount
+        if buffered_amount == 0 or withdrawal_shares == 0 or self.total_shares == 0 or self.nav == 0:
+            return 0, 0
+        if self.deposit_batch.id_ in self.depositBatchNetted or self.withdrawal_batch.id_ in self.withdrawalBatchNetted:
+            raise Exception("Batches already netted")
+
+        withdrawal_demand = withdrawal_shares * self.nav // self.total_shares
+        if withdrawal_demand <= buffered_amount:
+            notion, shares = withdrawal_demand, withdrawal_shares
+        else:
+            notion = buffered_amount
+            shares = notion * self.total_shares // self.nav
+        if shares == 0:
+            return 0, 0
+
+        self.deposit_batch.buffered_amount -= notion
+        self.withdrawal_batch.batch_shares_amount -= shares
+        self.depositBatchNetted[self.deposit_batch.id_] = (notion, shares)
+        self.withdrawalBatchNetted[self.withdrawal_batch.id_] = (shares, notion)
+        return notion, shares
 
     def transfer_notion_to_container_after_failed_enter(self, amount: int, container: Container) -> None:
         # check if container whitelisted
@@ -96,73 +218,152 @@ class Vault(ERC721):
             raise Exception("Not enough liquidity")
         self.notion.transfer(container.address, amount)
 
-    def deposit_container_callback(self, nav_after_harvest: int, nav_after_harvest_and_enter: int, notion_token_remainder: int) -> None:
+    def deposit_container_callback(
+        self,
+        nav_after_harvest: int,
+        nav_after_harvest_and_enter: int,
+        notion_token_remainder: int,
+        batch_id: int | None = None,
+        container: Container | None = None,
+    ) -> None:
         """
         Receive deposit confirmation from container
         As a result, during deposit callback receiving process
         of notion_token_remainder > 0 or nav_growth > 0, not together
         :param deposit_confirmation: struct
+        :param batch_id: batch the callback belongs to, oldest batch in flight by default
+        :param container: sender, next not processed container by default
         :return:
         """
+        pending_batch = self._pending_deposit(batch_id)
         nav_growth = nav_after_harvest_and_enter - nav_after_harvest
         if notion_token_remainder > 0 and nav_growth > 0:
             raise Exception("Container enter fully processed or fully canceled")
 
-        batch_total_remainder = self.pending_deposit_batch.notion_token_remainder
+        batch_total_remainder = pending_batch.notion_token_remainder
         if batch_total_remainder > 0 and nav_growth > 0:
             raise Exception("If some enter failed in batch, need to cancel enters in other containers")
-        if batch_total_remainder == 0 and notion_token_remainder > 0:
-            self._reset_pending_deposit_nav_growth()
+        restart = batch_total_remainder == 0 and notion_token_remainder > 0
+        callbacks = self._restarted_callbacks(pending_batch) if restart else pending_batch.callbacks
+        index = self._callback_index(callbacks, container)
+        if restart:
+            self._reset_pending_deposit_nav_growth(pending_batch)
 
         if notion_token_remainder > 0:
             """Claim notion token remainder from container"""
             """Waiting transfer"""
-            self.pending_deposit_batch.notion_token_remainder += notion_token_remainder
-            self.pending_deposit_batch.processed_containers.append("msg.sender")
+            pending_batch.notion_token_remainder += notion_token_remainder
+            pending_batch.callbacks.mark(index)
         elif nav_growth > 0:
-            self.pending_deposit_batch.nav_after_harvest += nav_after_harvest
-            self.pending_deposit_batch.nav_after_harvest_and_enter += nav_after_harvest_and_enter
-            self.pending_deposit_batch.processed_containers.append("msg.sender")
-
-    def _reset_pending_deposit_nav_growth(self):
+            pending_batch.nav_after_harvest += nav_after_harvest
+            pending_batch.nav_after_harvest_and_enter += nav_after_harvest_and_enter
+            pending_batch.callbacks.mark(index)
+
+    def deposit_container_callbacks(
+        self,
+        nav_after_harvest: list[int],
+        nav_after_harvest_and_enter: list[int],
+        notion_token_remainder: list[int],
+        batch_id: int | None = None,
+        containers: list[Container] | None = None,
+    ) -> None:
+        """
+        Receive deposit confirmations of many containers (one relayer delivery), arrays are aligned.
+        Same result as deposit_container_callback for every element in order, but whole delivery
+        is validated in one pass before any state changes and batch aggregates are updated once.
+        :param containers: senders, next not processed containers by default
+        """
+        count = len(nav_after_harvest)
+        if len(nav_after_harvest_and_enter) != count or len(notion_token_remainder) != count:
+            raise ValueError("Callback arrays must have same length")
+        if containers is not None and len(containers) != count:
+            raise ValueError("Callback arrays must have same length")
+        pending_batch = self._pending_deposit(batch_id)
+
+        failed = pending_batch.notion_token_remainder > 0
+        restarted = False
+        callbacks = pending_batch.callbacks.copy()
+        harvest_total = harvest_and_enter_total = remainder_total = 0
+        for i in range(count):
+            remainder = notion_token_remainder[i]
+            nav_growth = nav_after_harvest_and_enter[i] - nav_after_harvest[i]
+            if remainder > 0 and nav_growth > 0:
+                raise Exception("Container enter fully processed or fully canceled")
+            if failed and nav_growth > 0:
+                raise Exception("If some enter failed in batch, need to cancel enters in other containers")
+            if remainder > 0 and not failed:
+                # first failed enter: confirmations received so far are dropped, all containers report again
+                failed = True
+                restarted = True
+                callbacks = self._restarted_callbacks(pending_batch)
+                harvest_total = harvest_and_enter_total = 0
+            index = self._callback_index(callbacks, None if containers is None else containers[i])
+            if remainder > 0:
+                remainder_total += remainder
+                callbacks.mark(index)
+            elif nav_growth > 0:
+                harvest_total += nav_after_harvest[i]
+                harvest_and_enter_total += nav_after_harvest_and_enter[i]
+                callbacks.mark(index)
+
+        if restarted:
+            self._reset_pending_deposit_nav_growth(pending_batch)
+        pending_batch.callbacks = callbacks
+        pending_batch.notion_token_remainder += remainder_total
+        pending_batch.nav_after_harvest += harvest_total
+        pending_batch.nav_after_harvest_and_enter += harvest_and_enter_total
+
+    def _reset_pending_deposit_nav_growth(self, pending_batch: PendingDepositBatch):
         # todo: think about better solution
         # need to reset nav growth in case where enter in some container
         # failed during the batch deposit processing happen
-        self.pending_deposit_batch.nav_after_harvest = 0
-        self.pending_deposit_batch.nav_after_harvest_and_enter = 0
-        self.pending_deposit_batch.processed_containers = [] # mark that need to process all containers again (for withdraw funds)
+        pending_batch.nav_after_harvest = 0
+        pending_batch.nav_after_harvest_and_enter = 0
+        pending_batch.callbacks = self._restarted_callbacks(pending_batch) # mark that need to process all containers again (for withdraw funds)
 
-    def finish_deposit_batch_processing(self) -> None:
+    def finish_deposit_batch_processing(self, batch_id: int | None = None) -> None:
         """
-        Finish deposit batch processing
+        Finish deposit batch processing.
+        Batches finish strictly in start order: shares of batch are priced
+        against total shares including every earlier batch.
+        :param batch_id: must be oldest batch in flight, oldest batch by default
         :return:
         """
-        batch_notion_remainder = self.pending_deposit_batch.notion_token_remainder
-        batch_nav_growth = self.pending_deposit_batch.nav_after_harvest_and_enter - self.pending_deposit_batch.nav_after_harvest
+        pending_batch = self._pending_deposit(None)
+        if batch_id is not None and batch_id != pending_batch.id:
+            raise Exception("Deposit batches are finished in order")
+        batch_notion_remainder = pending_batch.notion_token_remainder
+        batch_nav_growth = pending_batch.nav_after_harvest_and_enter - pending_batch.nav_after_harvest
         if batch_notion_remainder > 0 and batch_nav_growth > 0:
             """Batch can be fully executed or fully reverted"""
             raise Exception("Batch fully executed or fully reverted")
-        if len(self.pending_deposit_batch.processed_containers) != len(self.containers):
+        if pending_batch.batch_nav > 0 and not pending_batch.callbacks.complete(len(self.containers)):
             raise Exception("Container has not been processed")
 
-        self.pending_deposit_batch.notion_token_remainder = 0
-        self.pending_deposit_batch.processed_containers = []
-        self.depositBatchNotionSent[self.pending_deposit_batch.id] = self.pending_deposit_batch.batch_nav
+        netted_notion, netted_shares = self.depositBatchNetted.get(pending_batch.id, (0, 0))
+        pending_batch.notion_token_remainder = 0
+        self.depositBatchNotionSent[pending_batch.id] = pending_batch.batch_nav + netted_notion
 
         if batch_notion_remainder > 0:
             """
             If batch fully reverted: save remainder from all exits for certain batch 
             for allow to users to claim their remainder
             """
-            self.depositBatchRemainders[self.pending_deposit_batch.id] = batch_notion_remainder
+            self.depositBatchRemainders[pending_batch.id] = batch_notion_remainder
         if batch_nav_growth > 0:
             """
             If batch fully  executed: mint shares and save batch shares and batch NAV into maps
             for making claim allowed by batch users
             """
-            shares = self._issue_shares(batch_nav_growth) # todo: think about mint ordering: in moment of batch processing or claim by user
-            self.depositBatchShares[self.pending_deposit_batch.id] = shares
-        self._reset_pending_deposit_nav_growth()
+            shares = self._issue_shares(batch_nav_growth, pending_batch.nav_after_harvest) # todo: think about mint ordering: in moment of batch processing or claim by user
+            self.depositBatchShares[pending_batch.id] = shares + netted_shares
+        elif netted_shares > 0 and batch_notion_remainder == 0:
+            """Fully netted batch: only netted shares to claim"""
+            self.depositBatchShares[pending_batch.id] = netted_shares
+        # reverted batch keeps netted shares in depositBatchNetted only, they are paid with remainder
+        self._reset_pending_deposit_nav_growth(pending_batch)
+        self.pending_deposit_batches.pop(pending_batch.id, None)
+        self._last_pending_deposit_batch = pending_batch
 
 
     def claim_remainder_after_deposit(self, position_id: int) -> int:
@@ -183,22 +384,53 @@ class Vault(ERC721):
 
         amount_for_claim = user_amount * batch_remainder // batch_amount
         self.notion.transfer(positionOwner, amount_for_claim)
+        _, netted_shares = self.depositBatchNetted.get(position.deposit_batch_id, (0, 0))
+        if netted_shares > 0:
+            """Part of batch was netted against withdrawals and kept its shares, position stays open"""
+            position.shares_amount = user_amount * netted_shares // batch_amount
+            position.notion_amount = 0
+            return amount_for_claim
         del position # Remove position because it actually does not exists if deposit failed
+        self.positions.remove_from_owner(position_id)
         return amount_for_claim
 
 
     def claim_shares_after_deposit(self, position_id: int) -> None:
-        """Claim shares after batch deposit"""
+        """Claim shares after batch deposit, position settled by settle_deposit_batch keeps its shares"""
         position = self.positions[position_id]
-        batch_total_shares = self.depositBatchShares[position.deposit_batch_id]
+        if position.notion_amount == 0 and position.shares_amount > 0:
+            raise Exception("Shares already claimed")
+        if self.depositBatchRemainders.get(position.deposit_batch_id, 0) > 0:
+            raise Exception("Batch reverted, claim remainder")
+        batch_total_shares = self.depositBatchShares.get(position.deposit_batch_id, 0)
         if batch_total_shares == 0:
             raise Exception("Batch has not been processed")
         batch_nav = self.depositBatchNotionSent[position.deposit_batch_id]
         user_shares = (position.notion_amount * batch_total_shares) // batch_nav
-        position.shares_amount = user_shares
+        position.shares_amount += user_shares
         position.notion_amount = 0
 
 
+    def settle_deposit_batch(self, batch_id: int) -> int:
+        """
+        Claim shares after batch deposit for every position of the batch at once.
+        Same floor semantics as claim_shares_after_deposit, batch maps are read once.
+        Positions already claimed one by one are skipped.
+        :return: total shares settled
+        """
+        if self.depositBatchRemainders.get(batch_id, 0) > 0:
+            raise Exception("Batch reverted, claim remainder")
+        batch_total_shares = self.depositBatchShares.get(batch_id, 0)
+        if batch_total_shares == 0:
+            raise Exception("Batch has not been processed")
+        batch_nav = self.depositBatchNotionSent[batch_id]
+        return self.positions.settle_shares(
+            self.positions.deposit_batch_range(batch_id),
+            batch_total_shares,
+            batch_nav,
+        )
+
+
     def create_withdrawal_request(self, position_id: int, shares_amount: int) -> None:
         """
         Create withdrawal request by user from his position for some shares.
@@ -213,6 +445,7 @@ class Vault(ERC721):
             raise NotEnoughShares()
         position.shares_amount -= shares_amount
         position.locked_shares_amount += shares_amount
+        self.positions.add_to_withdrawal_batch(position_id, self.withdrawal_batch.id_)
         self.withdrawal_batch.batch_shares_amount += shares_amount
 
     def start_current_withdrawal_batch_processing(self) -> None:
@@ -222,46 +455,99 @@ class Vault(ERC721):
         self.pending_withdrawal_batch.id_ = self.withdrawal_batch.id_
         self.pending_withdrawal_batch.batch_shares_amount = batch_shares_amount
         self.pending_withdrawal_batch.total_supply_snapshot = self.total_shares
+        self.pending_withdrawal_batch.callbacks = CallbackBitmap()
 
         self.withdrawal_batch.batch_shares_amount = 0
         self.withdrawal_batch.id_ += 1
 
+        if batch_shares_amount == 0:
+            # fully netted against deposits (net_current_batches): nothing to exit, netted withdrawers can claim now
+            self.finish_withdrawal_batch_processing()
+            return
         for container in self.containers:
             container.start_withdrawal(batch_shares_amount, self.pending_withdrawal_batch.total_supply_snapshot)
 
-    def withdrawal_container_callback(self, notion_growth: int) -> None:
+    def withdrawal_container_callback(self, notion_growth: int, container: Container | None = None) -> None:
         """
         Receive callback from container
         Withdraw result - only received notion token. All swaps should happens in container
+        :param container: sender, next not processed container by default
         """
+        self._check_withdrawal_not_finished()
+        callbacks = self.pending_withdrawal_batch.callbacks
+        index = self._callback_index(callbacks, container)
+        callbacks.mark(index)
         self.notion.transferFrom("msg.sender", "address(this)", notion_growth)
         self.withdrawalBatchNAVs[self.pending_withdrawal_batch.id_] += notion_growth
 
+    def withdrawal_container_callbacks(self, notion_growth: list[int], containers: list[Container] | None = None) -> None:
+        """
+        Receive withdrawal callbacks of many containers, arrays are aligned.
+        Senders are validated before any state changes, notion is transferred and batch NAV updated once.
+        :param containers: senders, next not processed containers by default
+        """
+        if containers is not None and len(containers) != len(notion_growth):
+            raise ValueError("Callback arrays must have same length")
+        self._check_withdrawal_not_finished()
+        callbacks = self.pending_withdrawal_batch.callbacks.copy()
+        for i in range(len(notion_growth)):
+            callbacks.mark(self._callback_index(callbacks, None if containers is None else containers[i]))
+        total_growth = sum(notion_growth)
+        self.notion.transferFrom("msg.sender", "address(this)", total_growth)
+        self.pending_withdrawal_batch.callbacks = callbacks
+        self.withdrawalBatchNAVs[self.pending_withdrawal_batch.id_] += total_growth
+
+    def withdrawal_batch_finished(self, withdrawal_batch_id: int) -> bool:
+        return withdrawal_batch_id in self.finishedWithdrawalBatches
+
+    def _check_withdrawal_not_finished(self) -> None:
+        if self.withdrawal_batch_finished(self.pending_withdrawal_batch.id_):
+            raise Exception("Withdrawal batch already finished")
+
     def finish_withdrawal_batch_processing(self) -> None:
-        """Specify amount of notion tokens for claim by user in batch"""
+        """Specify amount of notion tokens for claim by user in batch, once per batch"""
+        self._check_withdrawal_not_finished()
         nav_decrease = self.withdrawalBatchNAVs[self.pending_withdrawal_batch.id_]
         lps = self.pending_withdrawal_batch.batch_shares_amount
-        self.withdrawalBatchShares[self.pending_withdrawal_batch.id_] = lps
-        self._burn_shares(nav_decrease, lps)
+        netted_shares, netted_notion = self.withdrawalBatchNetted.get(self.pending_withdrawal_batch.id_, (0, 0))
+        if lps > 0 and not self.pending_withdrawal_batch.callbacks.complete(len(self.containers)):
+            raise Exception("Container has not been processed")
+        self.withdrawalBatchShares[self.pending_withdrawal_batch.id_] = lps + netted_shares
+        self.withdrawalBatchNAVs[self.pending_withdrawal_batch.id_] += netted_notion
+        self._burn_shares(nav_decrease, lps) # netted shares moved to depositors, not burned
+        self.finishedWithdrawalBatches.add(self.pending_withdrawal_batch.id_)
 
     def claim_withdrawn_notion_token(self, position_id: int, withdrawal_batch_id: int) -> int:
         position_owner = self.positionOwners[position_id]
-        batch_nav = self.withdrawalBatchNAVs[withdrawal_batch_id]
-        batch_shares = self.withdrawalBatchShares[withdrawal_batch_id]
-        if batch_shares == 0:
+        if not self.withdrawal_batch_finished(withdrawal_batch_id):
             raise Exception("Batch has not been processed")
+        batch_nav = self.withdrawalBatchNAVs.get(withdrawal_batch_id, 0)
+        batch_shares = self.withdrawalBatchShares.get(withdrawal_batch_id, 0)
         position = self.positions[position_id]
         amount_for_claim = (position.locked_shares_amount * batch_nav) // batch_shares
         position.locked_shares_amount -= amount_for_claim
+        self.positions.remove_from_withdrawal_batch(position_id, withdrawal_batch_id)
         self.notion.transfer(position_owner, amount_for_claim)
         return amount_for_claim
 
+    def deposit_batch_positions(self, batch_id: int) -> range:
+        """Position ids created in deposit batch"""
+        return self.positions.deposit_batch_range(batch_id)
+
+    def withdrawal_batch_positions(self, batch_id: int) -> list[int]:
+        """Position ids with unclaimed withdrawal request in withdrawal batch"""
+        return self.positions.withdrawal_batch_positions(batch_id)
+
+    def owner_positions(self, owner: Address) -> list[int]:
+        """Open position ids of owner"""
+        return self.positions.owner_positions(owner)
+
 
-    def _issue_shares(self, nav_growth: int) -> int:
+    def _issue_shares(self, nav_growth: int, nav_after_harvest: int) -> int:
         if self.nav == 0:
             shares = nav_growth
         else:
-            shares = nav_growth * self.total_shares // self.pending_deposit_batch.nav_after_harvest
+            shares = nav_growth * self.total_shares // nav_after_harvest
         self.total_shares += shares
         self.nav += nav_growth
         return shares